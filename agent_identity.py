@@ -1,196 +1,410 @@
 import base64
+import functools
 import hashlib
 import json
 import os
 import sqlite3
+import threading
 import time
-import json
-import base64
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sentinel_core.crypto import agent_id_from_pub_bytes as compute_agent_id
+from sentinel_core.utils import canonical_json
+
+# Ed25519 backend, resolved once at import: PyNaCl (libsodium) first,
+# cryptography (OpenSSL) as fallback.
+try:
+    from nacl.exceptions import BadSignatureError
+    from nacl.signing import SigningKey, VerifyKey
+    _ED25519_BACKEND = "nacl"
+except ImportError:
+    try:
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+        _ED25519_BACKEND = "cryptography"
+    except ImportError:
+        _ED25519_BACKEND = ""
+
+def _require_ed25519() -> None:
+    if not _ED25519_BACKEND:
+        raise RuntimeError(
+            "Missing Ed25519 dependency. Install one of: pynacl OR cryptography."
+        )
+
+def canonical_bytes(payload: dict) -> bytes:
+    """
+    json.dumps(sort_keys=True, separators=(",", ":")) bytes (orjson-backed,
+    see sentinel_core.utils.canonical_json).
+    """
+    return canonical_json(payload)
+
+@functools.lru_cache(maxsize=128)
+def _signer(priv_b64: str) -> Callable[[bytes], bytes]:
+    """
+    Build (once per key) a function that returns a raw Ed25519 signature.
+    Call _signer.cache_clear() after rotating keys in-process.
+    """
+    _require_ed25519()
+    sk = base64.b64decode(priv_b64.encode("utf-8"))
+
+    if _ED25519_BACKEND == "nacl":
+        nacl_key = SigningKey(sk)
+        return lambda msg: nacl_key.sign(msg).signature
+
+    return Ed25519PrivateKey.from_private_bytes(sk).sign
 
 def sign_payload(payload: dict, priv_b64: str) -> str:
     """
     Returns a base64 signature (Ed25519) over a canonical JSON payload.
     Canonicalization: json.dumps(sort_keys=True, separators=(",", ":"))
     """
-    msg = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
-    sk = base64.b64decode(priv_b64.encode("utf-8"))
+    sig = _signer(priv_b64)(canonical_bytes(payload))
+    return base64.b64encode(sig).decode("utf-8")
+
+
+@functools.lru_cache(maxsize=1024)
+def _verifier(pub_b64: str) -> Callable[[bytes, bytes], bool]:
+    """
+    Build (once per public key) a function msg, sig -> bool.
+    Raises ValueError if the key itself is unusable.
+    """
+    _require_ed25519()
+    pub = base64.b64decode(pub_b64.encode("utf-8"))
+
+    if _ED25519_BACKEND == "nacl":
+        try:
+            nacl_key = VerifyKey(pub)
+        except Exception as e:
+            raise ValueError(f"bad Ed25519 public key: {e}")
+
+        def _nacl_verify(msg: bytes, sig: bytes) -> bool:
+            try:
+                nacl_key.verify(msg, sig)
+                return True
+            except (BadSignatureError, ValueError, TypeError):
+                return False
+
+        return _nacl_verify
+
+    try:
+        key = Ed25519PublicKey.from_public_bytes(pub)
+    except Exception as e:
+        raise ValueError(f"bad Ed25519 public key: {e}")
+
+    def _crypto_verify(msg: bytes, sig: bytes) -> bool:
+        try:
+            key.verify(sig, msg)
+            return True
+        except (InvalidSignature, ValueError, TypeError):
+            return False
+
+    return _crypto_verify
 
-    # Try cryptography first
+def verify_signature(pub_b64: str, payload: dict, signature_b64: str) -> bool:
+    """
+    Verify an Ed25519 signature made by sign_payload (same canonical bytes).
+    Never raises; anything malformed is simply False.
+    """
     try:
-        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
-        priv = Ed25519PrivateKey.from_private_bytes(sk)
-        sig = priv.sign(msg)
-        return base64.b64encode(sig).decode("utf-8")
-    except ModuleNotFoundError:
-        pass
-
-    # Fallback to PyNaCl
+        return verify_signature_bytes(pub_b64, canonical_bytes(payload), signature_b64)
+    except Exception:
+        return False
+
+def verify_signature_bytes(pub_b64: str, msg: bytes, signature_b64: str) -> bool:
+    """
+    verify_signature over already-canonicalized bytes (see canonical_bytes).
+    """
     try:
-        from nacl.signing import SigningKey
-        priv = SigningKey(sk)
-        sig = priv.sign(msg).signature
-        return base64.b64encode(sig).decode("utf-8")
-    except ModuleNotFoundError:
-        raise RuntimeError(
-            "Missing Ed25519 dependency. Install one of: cryptography OR pynacl."
-        )
+        sig = base64.b64decode(signature_b64)
+        return _verifier(pub_b64)(msg, sig)
+    except Exception:
+        return False
 
-from typing import Any, Dict, Optional
+def verify_batch(msgs: List[dict], sigs: List[str], pubs: List[str]) -> List[bool]:
+    """
+    Verify N (payload, signature_b64, pub_b64) triples, returning one bool each.
+    Key parsing is shared across the batch (and across calls) via _verifier,
+    so queues signed by a handful of agents only decode each key once.
+    Neither PyNaCl nor cryptography exposes Ed25519 multi-scalar batch
+    verification, so each signature is still checked individually.
+    """
+    if not (len(msgs) == len(sigs) == len(pubs)):
+        raise ValueError("msgs, sigs and pubs must have the same length")
+    return [verify_signature(pub, msg, sig) for msg, sig, pub in zip(msgs, sigs, pubs)]
 
 # ----------------------------
 # Storage (SQLite)
 # ----------------------------
 
+# One connection per thread, reused across calls. sqlite3 keeps its own
+# LRU cache of prepared statements per connection (keyed by SQL text), so
+# the SQL below is written as module constants and only parsed once.
+_local = threading.local()
+_SCHEMA_READY = False
+_SCHEMA_LOCK = threading.Lock()
+_STMT_CACHE_SIZE = 256
+
+# Applied once per connection: WAL so readers don't block on a writer,
+# mmap'd reads (256 MiB) and a 64 MiB page cache so the agents table stays
+# in memory, temp b-trees in RAM.
+_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_size=-65536;
+PRAGMA temp_store=MEMORY;
+"""
+
+SQL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    agent_id TEXT PRIMARY KEY,
+    pub_b64   TEXT NOT NULL,
+    display_name TEXT NOT NULL DEFAULT '',
+    metadata_json TEXT NOT NULL DEFAULT '{}',
+    revoked INTEGER NOT NULL DEFAULT 0,
+    created_ts INTEGER NOT NULL
+)
+"""
+SQL_SELECT_REVOKED = "SELECT agent_id, revoked FROM agents WHERE agent_id = ?"
+# Covering partial index for the verification hot path (live agents only)
+SQL_LIVE_INDEX = "CREATE INDEX IF NOT EXISTS ix_agents_live ON agents(agent_id, pub_b64) WHERE revoked = 0"
+SQL_SELECT_ID = "SELECT agent_id FROM agents WHERE agent_id = ?"
+SQL_SELECT_LIVE_PUBKEY = "SELECT pub_b64 FROM agents WHERE agent_id = ? AND revoked = 0"
+SQL_SELECT_PUBKEY_REVOKED = "SELECT pub_b64, revoked FROM agents WHERE agent_id = ?"
+SQL_SELECT_AGENT = (
+    "SELECT agent_id, pub_b64, display_name, metadata_json, revoked, created_ts FROM agents WHERE agent_id = ?"
+)
+SQL_LIST_AGENTS = (
+    "SELECT agent_id, pub_b64, display_name, metadata_json, revoked, created_ts FROM agents ORDER BY created_ts DESC"
+)
+SQL_UPDATE_AGENT = "UPDATE agents SET pub_b64 = ?, display_name = ?, metadata_json = ? WHERE agent_id = ?"
+SQL_INSERT_AGENT = (
+    "INSERT INTO agents (agent_id, pub_b64, display_name, metadata_json, revoked, created_ts) "
+    "VALUES (?, ?, ?, ?, 0, ?)"
+)
+SQL_UPSERT_AGENT = (
+    SQL_INSERT_AGENT + " ON CONFLICT(agent_id) DO UPDATE SET "
+    "pub_b64 = excluded.pub_b64, display_name = excluded.display_name, metadata_json = excluded.metadata_json"
+)
+SQL_SET_REVOKED = "UPDATE agents SET revoked = ? WHERE agent_id = ?"
+
 def _db_path() -> str:
     # Use same DB file as Sentinel if you want one DB
     return os.getenv("SENTINEL_DB_PATH", "sentinel.db")
 
-def _connect() -> sqlite3.Connection:
-    conn = sqlite3.connect(_db_path())
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def _ensure_schema() -> None:
-    conn = _connect()
-    try:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS agents (
-                agent_id TEXT PRIMARY KEY,
-                pub_b64   TEXT NOT NULL,
-                display_name TEXT NOT NULL DEFAULT '',
-                metadata_json TEXT NOT NULL DEFAULT '{}',
-                revoked INTEGER NOT NULL DEFAULT 0,
-                created_ts INTEGER NOT NULL
-            )
-            """
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    global _SCHEMA_READY
+    if _SCHEMA_READY:
+        return
+    with _SCHEMA_LOCK:
+        if _SCHEMA_READY:
+            return
+        with conn:
+            conn.execute(SQL_SCHEMA)
+            conn.execute(SQL_LIVE_INDEX)
+        _SCHEMA_READY = True
+
+def _conn() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(
+            _db_path(),
+            timeout=10,
+            check_same_thread=False,
+            cached_statements=_STMT_CACHE_SIZE,
         )
-        conn.commit()
-    finally:
-        conn.close()
+        conn.row_factory = sqlite3.Row
+        conn.executescript(_PRAGMAS)
+        _local.conn = conn
+    _ensure_schema(conn)
+    return conn
 
 # ----------------------------
 # Helpers
 # ----------------------------
 
-def _normalize_pub(pub_b64: str) -> str:
+_PUB_KEY_LEN = 32     # raw Ed25519 public key
+_PUB_B64_LEN = 44     # its padded base64 form
+
+def _normalize_pub(pub_b64: str) -> Tuple[str, bytes]:
+    """
+    Returns (pub_b64, raw_key_bytes). Callers reuse the decoded bytes for
+    the agent ID instead of decoding again.
+    Only a padded, strictly valid base64 Ed25519 key (32 bytes / 44 chars)
+    is accepted.
+    """
     pub_b64 = (pub_b64 or "").strip()
     if not pub_b64:
         raise ValueError("pub_b64 is required")
 
-    # Validate it's base64 and decodes to something non-empty
+    # Cheap shape check before decoding
+    if len(pub_b64) != _PUB_B64_LEN or not pub_b64.endswith("="):
+        raise ValueError(f"pub_b64 must be a {_PUB_B64_LEN}-char padded base64 Ed25519 key")
+
     try:
-        raw = base64.b64decode(pub_b64 + "==", validate=False)
+        raw = base64.b64decode(pub_b64, validate=True)
     except Exception as e:
         raise ValueError(f"pub_b64 is not valid base64: {e}")
 
-    if not raw or len(raw) < 16:
-        raise ValueError("pub_b64 decoded too short (invalid key?)")
+    if len(raw) != _PUB_KEY_LEN:
+        raise ValueError(f"pub_b64 must decode to {_PUB_KEY_LEN} bytes (got {len(raw)})")
 
-    return pub_b64
+    return pub_b64, raw
 
-def agent_id_from_pub(pub_b64: str) -> str:
-    # Stable ID derived from pubkey string
+def _legacy_agent_id(pub_b64: str) -> str:
+    # Deprecated: IDs used to be derived from the base64 text. Only used to
+    # keep agents registered under the old scheme resolving to their row.
     h = hashlib.sha256(pub_b64.encode("utf-8")).hexdigest()[:16]
     return f"agent_{h}"
 
+def agent_id_from_pub(pub_b64: str) -> str:
+    """
+    Stable ID derived from the raw pubkey bytes (same scheme as identity_redis).
+    Keys the stricter check rejects keep their old text-derived ID instead of
+    raising. Agents registered under the old scheme may be stored under
+    _legacy_agent_id; register_agent/register_agents resolve that.
+    """
+    try:
+        _, raw = _normalize_pub(pub_b64)
+    except ValueError:
+        return _legacy_agent_id(pub_b64)
+    return compute_agent_id(raw)
+
+def _existing_row(conn: sqlite3.Connection, agent_id: str, pub_b64: str) -> Tuple[str, Optional[sqlite3.Row]]:
+    """
+    (agent_id, row) for an already registered key; agents registered before
+    IDs were derived from raw key bytes keep their legacy row.
+    """
+    row = conn.execute(SQL_SELECT_REVOKED, (agent_id,)).fetchone()
+    if not row:
+        legacy_id = _legacy_agent_id(pub_b64)
+        legacy = conn.execute(SQL_SELECT_REVOKED, (legacy_id,)).fetchone()
+        if legacy:
+            return legacy_id, legacy
+    return agent_id, row
+
 # ----------------------------
 # Public API (what sentinel_api imports)
 # ----------------------------
 
 def register_agent(pub_b64: str, display_name: str = "", metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    _ensure_schema()
-    pub_b64 = _normalize_pub(pub_b64)
-    agent_id = agent_id_from_pub(pub_b64)
+    pub_b64, raw = _normalize_pub(pub_b64)
+    agent_id = compute_agent_id(raw)
     display_name = (display_name or "").strip()
     metadata = metadata or {}
+    metadata_json = json.dumps(metadata, separators=(",", ":"), sort_keys=True)
 
-    conn = _connect()
-    try:
-        cur = conn.execute("SELECT agent_id, revoked FROM agents WHERE agent_id = ?", (agent_id,))
-        row = cur.fetchone()
+    conn = _conn()
+    with conn:
+        agent_id, row = _existing_row(conn, agent_id, pub_b64)
 
         if row:
             # Update existing record (don’t reset created_ts)
-            conn.execute(
-                """
-                UPDATE agents
-                SET pub_b64 = ?, display_name = ?, metadata_json = ?
-                WHERE agent_id = ?
-                """,
-                (pub_b64, display_name, json.dumps(metadata, separators=(",", ":"), sort_keys=True), agent_id),
-            )
-            conn.commit()
+            conn.execute(SQL_UPDATE_AGENT, (pub_b64, display_name, metadata_json, agent_id))
         else:
-            conn.execute(
-                """
-                INSERT INTO agents (agent_id, pub_b64, display_name, metadata_json, revoked, created_ts)
-                VALUES (?, ?, ?, ?, 0, ?)
-                """,
-                (
-                    agent_id,
-                    pub_b64,
-                    display_name,
-                    json.dumps(metadata, separators=(",", ":"), sort_keys=True),
-                    int(time.time()),
-                ),
-            )
-            conn.commit()
+            conn.execute(SQL_INSERT_AGENT, (agent_id, pub_b64, display_name, metadata_json, int(time.time())))
 
-        return {
-            "agent_id": agent_id,
+    return {
+        "agent_id": agent_id,
+        "pub_b64": pub_b64,
+        "display_name": display_name,
+        "metadata": metadata,
+        "revoked": bool(row["revoked"]) if row else False,
+    }
+
+def register_agents(rows: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """
+    Bulk variant of register_agent for onboarding batches.
+    rows: [(pub_b64, display_name, metadata), ...]
+    All rows are validated before anything is written, then upserted in a
+    single transaction (existing agents keep their created_ts and revoked flag).
+    Returns the same dicts as register_agent, in row order.
+    """
+    now = int(time.time())
+    agents = []
+    for pub_b64, display_name, metadata in rows:
+        pub_b64, raw = _normalize_pub(pub_b64)
+        agents.append({
+            "agent_id": compute_agent_id(raw),
             "pub_b64": pub_b64,
-            "display_name": display_name,
-            "metadata": metadata,
-            "revoked": bool(row["revoked"]) if row else False,
-        }
-    finally:
-        conn.close()
+            "display_name": (display_name or "").strip(),
+            "metadata": metadata or {},
+        })
+
+    conn = _conn()
+    with conn:
+        for a in agents:
+            a["agent_id"], row = _existing_row(conn, a["agent_id"], a["pub_b64"])
+            a["revoked"] = bool(row["revoked"]) if row else False
+
+        conn.executemany(SQL_UPSERT_AGENT, [
+            (
+                a["agent_id"],
+                a["pub_b64"],
+                a["display_name"],
+                json.dumps(a["metadata"], separators=(",", ":"), sort_keys=True),
+                now,
+            )
+            for a in agents
+        ])
+
+    return agents
 
 def get_agent(agent_id: str) -> Optional[Dict[str, Any]]:
-    _ensure_schema()
     agent_id = (agent_id or "").strip()
     if not agent_id:
         return None
 
-    conn = _connect()
-    try:
-        cur = conn.execute(
-            "SELECT agent_id, pub_b64, display_name, metadata_json, revoked, created_ts FROM agents WHERE agent_id = ?",
-            (agent_id,),
-        )
-        row = cur.fetchone()
-        if not row:
-            return None
-        return {
-            "agent_id": row["agent_id"],
-            "pub_b64": row["pub_b64"],
-            "display_name": row["display_name"],
-            "metadata": json.loads(row["metadata_json"] or "{}"),
-            "revoked": bool(row["revoked"]),
-            "created_ts": int(row["created_ts"]),
-        }
-    finally:
-        conn.close()
+    row = _conn().execute(SQL_SELECT_AGENT, (agent_id,)).fetchone()
+    if not row:
+        return None
+    return {
+        "agent_id": row["agent_id"],
+        "pub_b64": row["pub_b64"],
+        "display_name": row["display_name"],
+        "metadata": json.loads(row["metadata_json"] or "{}"),
+        "revoked": bool(row["revoked"]),
+        "created_ts": int(row["created_ts"]),
+    }
+
+def get_pubkey(agent_id: str) -> Optional[str]:
+    """
+    pub_b64 of a live (non-revoked) agent, or None. Skips metadata entirely.
+    """
+    agent_id = (agent_id or "").strip()
+    if not agent_id:
+        return None
+    row = _conn().execute(SQL_SELECT_LIVE_PUBKEY, (agent_id,)).fetchone()
+    return row["pub_b64"] if row else None
 
-def revoke_agent(agent_id: str) -> Dict[str, Any]:
-    _ensure_schema()
+def get_pubkey_and_revoked(agent_id: str) -> Optional[Tuple[str, bool]]:
+    """
+    (pub_b64, revoked) for signature checks that need to tell unknown and
+    revoked agents apart, without decoding metadata_json. None if unknown.
+    """
+    agent_id = (agent_id or "").strip()
+    if not agent_id:
+        return None
+    row = _conn().execute(SQL_SELECT_PUBKEY_REVOKED, (agent_id,)).fetchone()
+    if not row:
+        return None
+    return row["pub_b64"], bool(row["revoked"])
+
+def _set_revoked(agent_id: str, revoked: bool) -> Dict[str, Any]:
     agent_id = (agent_id or "").strip()
     if not agent_id:
         raise ValueError("agent_id required")
 
-    conn = _connect()
-    try:
-        cur = conn.execute("SELECT agent_id FROM agents WHERE agent_id = ?", (agent_id,))
-        row = cur.fetchone()
+    conn = _conn()
+    with conn:
+        row = conn.execute(SQL_SELECT_ID, (agent_id,)).fetchone()
         if not row:
             raise ValueError("Agent not found")
+        conn.execute(SQL_SET_REVOKED, (1 if revoked else 0, agent_id))
+    return {"agent_id": agent_id, "revoked": revoked}
 
-        conn.execute("UPDATE agents SET revoked = 1 WHERE agent_id = ?", (agent_id,))
-        conn.commit()
-        return {"agent_id": agent_id, "revoked": True}
-    finally:
-        conn.close()
+def revoke_agent(agent_id: str) -> Dict[str, Any]:
+    return _set_revoked(agent_id, True)
 
 
 def suspend_agent_identity(agent_id: str) -> Dict[str, Any]:
@@ -198,48 +412,22 @@ def suspend_agent_identity(agent_id: str) -> Dict[str, Any]:
 
 
 def activate_agent_identity(agent_id: str) -> Dict[str, Any]:
-    _ensure_schema()
-    agent_id = (agent_id or "").strip()
-    if not agent_id:
-        raise ValueError("agent_id required")
-
-    conn = _connect()
-    try:
-        cur = conn.execute("SELECT agent_id FROM agents WHERE agent_id = ?", (agent_id,))
-        row = cur.fetchone()
-        if not row:
-            raise ValueError("Agent not found")
-
-        conn.execute("UPDATE agents SET revoked = 0 WHERE agent_id = ?", (agent_id,))
-        conn.commit()
-        return {"agent_id": agent_id, "revoked": False}
-    finally:
-        conn.close()
+    return _set_revoked(agent_id, False)
 
 def list_agents() -> list[dict]:
-    _ensure_schema()
+    rows = _conn().execute(SQL_LIST_AGENTS).fetchall()
 
-    conn = _connect()
-    try:
-        cur = conn.execute(
-            "SELECT agent_id, pub_b64, display_name, metadata_json, revoked, created_ts FROM agents ORDER BY created_ts DESC"
-        )
-
-        rows = cur.fetchall()
-
-        return [
-            {
-                "agent_id": row["agent_id"],
-                "pub_b64": row["pub_b64"],
-                "display_name": row["display_name"],
-                "metadata": json.loads(row["metadata_json"] or "{}"),
-                "revoked": bool(row["revoked"]),
-                "created_ts": int(row["created_ts"]),
-            }
-            for row in rows
-        ]
-    finally:
-        conn.close()
+    return [
+        {
+            "agent_id": row["agent_id"],
+            "pub_b64": row["pub_b64"],
+            "display_name": row["display_name"],
+            "metadata": json.loads(row["metadata_json"] or "{}"),
+            "revoked": bool(row["revoked"]),
+            "created_ts": int(row["created_ts"]),
+        }
+        for row in rows
+    ]
 
 # ----------------------------
 # Optional: your existing keypair generator
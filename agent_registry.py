@@ -9,6 +9,14 @@ def register_agent(agent_id: str, pub_b64: str):
     r.set(f"agents:pubkey:{agent_id}", pub_b64)
 
 
+def register_many(pairs: dict[str, str] | list[tuple[str, str]]):
+    # One MSET round-trip for a batch of (agent_id, pub_b64)
+    items = pairs.items() if isinstance(pairs, dict) else pairs
+    mapping = {f"agents:pubkey:{agent_id}": pub_b64 for agent_id, pub_b64 in items}
+    if mapping:
+        r.mset(mapping)
+
+
 def get_pubkey(agent_id: str) -> str | None:
     return r.get(f"agents:pubkey:{agent_id}")
 
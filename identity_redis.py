@@ -1,21 +1,22 @@
 import os
 import json
 import base64
-import hashlib
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import redis
 
+from sentinel_core.crypto import agent_id_from_pub_bytes
+from sentinel_core.utils import dumps
+
 def _r() -> redis.Redis:
     url = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
     return redis.from_url(url, decode_responses=True)
 
 def compute_agent_id(pub_bytes: bytes) -> str:
-    h = hashlib.sha256(pub_bytes).hexdigest()[:16]
-    return f"agent_{h}"
+    return agent_id_from_pub_bytes(pub_bytes)
 
-def register_agent(pub_b64: str, display_name: str = "", metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def _agent_payload(pub_b64: str, display_name: str = "", metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     metadata = metadata or {}
 
     try:
@@ -23,23 +24,44 @@ def register_agent(pub_b64: str, display_name: str = "", metadata: Optional[Dict
     except Exception:
         raise ValueError("bad pub_b64 (must be base64)")
 
-    agent_id = compute_agent_id(pub_bytes)
-    key = f"agent:{agent_id}"
-
-    payload = {
-        "agent_id": agent_id,
+    return {
+        "agent_id": compute_agent_id(pub_bytes),
         "pub_b64": pub_b64,
         "display_name": display_name or "",
         "metadata": metadata,
         "created_at": datetime.now(timezone.utc).isoformat(),
     }
 
-    r = _r()
-    r.set(key, json.dumps(payload, separators=(",", ":"), sort_keys=True))
-    r.sadd("agents:set", agent_id)
+def _queue_register(pipe, payload: Dict[str, Any]) -> None:
+    agent_id = payload["agent_id"]
+    pipe.set(f"agent:{agent_id}", dumps(payload, sort_keys=True))
+    pipe.sadd("agents:set", agent_id)
+
+def register_agent(pub_b64: str, display_name: str = "", metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    payload = _agent_payload(pub_b64, display_name, metadata)
+
+    pipe = _r().pipeline(transaction=False)
+    _queue_register(pipe, payload)
+    pipe.execute()
 
     return payload
 
+def register_agents(items: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """
+    Bulk register: items = [(pub_b64, display_name, metadata), ...].
+    Every key is validated first, then all writes go out in one pipeline flush.
+    """
+    payloads = [_agent_payload(pub_b64, display_name, metadata) for pub_b64, display_name, metadata in items]
+    if not payloads:
+        return []
+
+    pipe = _r().pipeline(transaction=False)
+    for payload in payloads:
+        _queue_register(pipe, payload)
+    pipe.execute()
+
+    return payloads
+
 def get_agent(agent_id: str) -> Optional[Dict[str, Any]]:
     r = _r()
     raw = r.get(f"agent:{agent_id}")
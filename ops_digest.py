@@ -1,11 +1,34 @@
-import json
 import hashlib
+from functools import lru_cache
 from typing import Any, Dict
 
+from sentinel_core.utils import canonical_json
 
-def _canon(obj: Dict[str, Any]) -> str:
-    # Stable JSON across all workers
-    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+def _canon(obj: Dict[str, Any]) -> bytes:
+    # Stable JSON across all workers (sort_keys, compact, ensure_ascii=False)
+    return canonical_json(obj, ensure_ascii=False)
+
+
+def action_intent(action: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Immutable intent of an action (the only fields that are digested).
+    """
+    return {
+        "type": (action.get("type") or "").strip(),
+        "target": (action.get("target") or "").strip(),
+        "params": action.get("params") or {},
+    }
+
+
+@lru_cache(maxsize=1024)
+def digest_canonical(canon: bytes) -> str:
+    """
+    Digest already-canonicalized intent bytes (see action_intent/_canon).
+    Memoized: the same intent is re-digested at propose, approve and execute.
+    """
+    h = hashlib.sha256(canon).hexdigest()
+    return f"sha256:{h}"
 
 
 def digest_action(action: Dict[str, Any]) -> str:
@@ -16,10 +39,4 @@ def digest_action(action: Dict[str, Any]) -> str:
       - params
     Never include: reason, timestamps, manager, fingerprint, incident_id, etc.
     """
-    payload = {
-        "type": (action.get("type") or "").strip(),
-        "target": (action.get("target") or "").strip(),
-        "params": action.get("params") or {},
-    }
-    h = hashlib.sha256(_canon(payload).encode("utf-8")).hexdigest()
-    return f"sha256:{h}"
+    return digest_canonical(_canon(action_intent(action)))
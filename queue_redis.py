@@ -1,24 +1,33 @@
 import os
 import json
 import hmac
-import hashlib
-from datetime import datetime, timezone
 
 import redis
 
+from sentinel_core.utils import canonical_json, dumps, utc_now_iso
+
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0").strip()
 QUEUE_SIGNING_SECRET = os.getenv("QUEUE_SIGNING_SECRET", "").strip()
+# Keyed once; copied per message so the key schedule isn't redone
+_HMAC_PROTO = hmac.new(QUEUE_SIGNING_SECRET.encode("utf-8"), digestmod="sha256")
+REDIS_POOL_MAX = int(os.getenv("REDIS_POOL_MAX", "32"))
 
-r = redis.from_url(REDIS_URL, decode_responses=True)
+_POOL = redis.BlockingConnectionPool.from_url(REDIS_URL, max_connections=REDIS_POOL_MAX, decode_responses=True)
+r = redis.Redis(connection_pool=_POOL)
 
-def _jdump(obj) -> str:
-    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+def _jbytes(obj) -> bytes:
+    return canonical_json(obj, ensure_ascii=False)
 
 def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    return utc_now_iso()
+
+def _hmac_raw(data: bytes) -> bytes:
+    h = _HMAC_PROTO.copy()
+    h.update(data)
+    return h.digest()
 
-def _hmac_sig(data: str) -> str:
-    return hmac.new(QUEUE_SIGNING_SECRET.encode("utf-8"), data.encode("utf-8"), hashlib.sha256).hexdigest()
+def _hmac_sig(data: bytes) -> str:
+    return _hmac_raw(data).hex()
 
 def _wrap(payload: dict) -> dict:
     """
@@ -30,7 +39,7 @@ def _wrap(payload: dict) -> dict:
 
     ts = _now_iso()
     body = {"v": 1, "ts": ts, "payload": payload}
-    sig = _hmac_sig(_jdump(body))
+    sig = _hmac_sig(_jbytes(body))
     body["sig"] = sig
     return body
 
@@ -42,9 +51,12 @@ def _unwrap(obj: dict) -> dict | None:
     if not isinstance(obj, dict) or "payload" not in obj or "sig" not in obj or "ts" not in obj:
         return None
 
-    sig = str(obj.get("sig") or "")
+    try:
+        sig = bytes.fromhex(str(obj.get("sig") or ""))
+    except ValueError:
+        return None
     unsigned = {"v": obj.get("v", 1), "ts": obj.get("ts"), "payload": obj.get("payload")}
-    expected = _hmac_sig(_jdump(unsigned))
+    expected = _hmac_raw(_jbytes(unsigned))
     if not hmac.compare_digest(expected, sig):
         return None
 
@@ -53,7 +65,8 @@ def _unwrap(obj: dict) -> dict | None:
 
 def qpush(queue_name: str, payload: dict) -> None:
     msg = _wrap(payload)
-    r.rpush(queue_name, _jdump(msg))
+    # Consumers re-canonicalize before checking sig, so wire key order is free
+    r.rpush(queue_name, dumps(msg))
 
 def qpop(queue_name: str, timeout: int = 0) -> dict | None:
     """
@@ -70,6 +83,28 @@ def qpop(queue_name: str, timeout: int = 0) -> dict | None:
         if raw is None:
             return None
 
+    return _decode(raw)
+
+def qpop_many(queue_name: str, count: int, timeout: int = 0) -> list[dict]:
+    """
+    Up to `count` payloads in one round trip: BLMPOP if timeout > 0 else
+    LMPOP (Redis >= 7). Invalid/tampered items are dropped, like qpop.
+    """
+    if timeout and timeout > 0:
+        item = r.blmpop(timeout, 1, queue_name, direction="LEFT", count=count)
+    else:
+        item = r.lmpop(1, queue_name, direction="LEFT", count=count)
+    if not item:
+        return []
+    _, raws = item
+    out = []
+    for raw in raws:
+        payload = _decode(raw)
+        if payload is not None:
+            out.append(payload)
+    return out
+
+def _decode(raw: str) -> dict | None:
     try:
         obj = json.loads(raw)
     except Exception:
@@ -77,6 +112,22 @@ def qpop(queue_name: str, timeout: int = 0) -> dict | None:
 
     return _unwrap(obj)
 
+def claim(queue_name: str, inflight_q: str, timeout: int = 0) -> str | None:
+    """
+    Atomically move the head of queue_name to the tail of inflight_q and
+    return it (BLMOVE if timeout > 0 else LMOVE; Redis >= 6.2).
+    The item is never out of both lists, so a consumer crash leaves it in
+    inflight_q for the reaper; stamp claimed_ts right after this returns.
+    Returns the raw item (e.g. an action_id) or None if empty.
+    """
+    if timeout and timeout > 0:
+        return r.blmove(queue_name, inflight_q, timeout, "LEFT", "RIGHT")
+    return r.lmove(queue_name, inflight_q, "LEFT", "RIGHT")
+
+def ack(inflight_q: str, item: str) -> None:
+    """Drop a finished item from inflight_q."""
+    r.lrem(inflight_q, 1, item)
+
 
 # --- Compatibility wrapper for sentinel_api enqueue path ---
 def get_queue_redis():
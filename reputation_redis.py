@@ -1,18 +1,40 @@
 import os
 import redis
-from datetime import datetime, timezone
+
+from sentinel_core.utils import utc_now_iso
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
+REDIS_POOL_MAX = int(os.getenv("REDIS_POOL_MAX", "32"))
+
+# One pool per process; the client is thread-safe and checks a connection
+# out per command instead of dialing Redis on every call. Blocking, so a
+# burst past REDIS_POOL_MAX waits for a free connection instead of failing.
+_POOL = redis.BlockingConnectionPool.from_url(REDIS_URL, max_connections=REDIS_POOL_MAX, decode_responses=True)
+_client = redis.Redis(connection_pool=_POOL)
 
-def _r():
-    return redis.from_url(REDIS_URL, decode_responses=True)
+# Read, clamp to [0, 1], write score + meta in one atomic round trip.
+# KEYS: rep:<id>, repmeta:<id>   ARGV: delta, updated_at
+_BUMP = _client.register_script("""
+local v = tonumber(redis.call('GET', KEYS[1])) or 1
+v = v + tonumber(ARGV[1])
+if v < 0 then v = 0 end
+if v > 1 then v = 1 end
+local s = tostring(v)
+redis.call('SET', KEYS[1], s)
+redis.call('HSET', KEYS[2], 'score', s, 'updated_at', ARGV[2])
+return s
+""")
 
 def rep_key(agent_id: str) -> str:
     return f"rep:{agent_id}"
 
-def get_rep(agent_id: str) -> float:
-    r = _r()
-    val = r.get(rep_key(agent_id))
+def _now_iso() -> str:
+    return utc_now_iso()
+
+def parse_rep(val) -> float:
+    """
+    Score from a raw rep:<id> value (e.g. fetched in a caller's pipeline).
+    """
     if val is None:
         # default starting rep
         return 1.0
@@ -21,19 +43,23 @@ def get_rep(agent_id: str) -> float:
     except Exception:
         return 1.0
 
+def get_rep(agent_id: str) -> float:
+    return parse_rep(_client.get(rep_key(agent_id)))
+
 def set_rep(agent_id: str, score: float) -> float:
-    r = _r()
     score = max(0.0, min(1.0, float(score)))
-    r.set(rep_key(agent_id), str(score))
-    r.hset(f"repmeta:{agent_id}", mapping={
-        "score": str(score),
-        "updated_at": datetime.now(timezone.utc).isoformat(),
-    })
+    with _client.pipeline(transaction=True) as p:
+        p.set(rep_key(agent_id), str(score))
+        p.hset(f"repmeta:{agent_id}", mapping={
+            "score": str(score),
+            "updated_at": _now_iso(),
+        })
+        p.execute()
     return score
 
 def bump_rep(agent_id: str, delta: float) -> float:
-    current = get_rep(agent_id)
-    return set_rep(agent_id, current + float(delta))
+    # Atomic: concurrent bumps for the same agent no longer overwrite each other.
+    return float(_BUMP(keys=[rep_key(agent_id), f"repmeta:{agent_id}"], args=[float(delta), _now_iso()]))
 
 def apply_outcome(agent_id: str, decision: str) -> float:
     """
@@ -1,8 +1,10 @@
 import base64
 import json
 import time
-from dataclasses import dataclass
-from typing import Any, Dict
+from dataclasses import dataclass, field
+from functools import cached_property
+from json.encoder import encode_basestring_ascii as _json_str
+from typing import Any, Dict, List, Tuple
 
 import requests
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
@@ -14,16 +16,26 @@ class SentinelAgentClient:
     agent_id: str
     priv_b64: str
     timeout: float = 15.0
+    # Keep-alive: reuses the TCP/TLS connection across analyze() calls
+    session: requests.Session = field(default_factory=requests.Session, repr=False)
+
+    @cached_property
+    def _key(self) -> Ed25519PrivateKey:
+        # Decoded once per client, not once per signature
+        return self._private_key()
 
     def _private_key(self) -> Ed25519PrivateKey:
         return Ed25519PrivateKey.from_private_bytes(base64.b64decode(self.priv_b64))
 
     def _sign_payload(self, payload: Dict[str, Any]) -> str:
         msg = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
-        sig = self._private_key().sign(msg)
-        return base64.b64encode(sig).decode("utf-8")
+        return self._sign_bytes(msg)
 
-    def analyze(self, command: Dict[str, Any], timestamp: str | None = None) -> Dict[str, Any]:
+    def _sign_bytes(self, msg: bytes) -> str:
+        return base64.b64encode(self._key.sign(msg)).decode("utf-8")
+
+    def _signed_request(self, command: Dict[str, Any], timestamp: str | None = None) -> Tuple[Dict[str, Any], str, str]:
+        """(body, ts_unix, signature) for one /analyze request."""
         ts_unix = str(int(time.time()))
         body = {
             "agent_id": self.agent_id,
@@ -31,20 +43,24 @@ class SentinelAgentClient:
             "timestamp": timestamp or ts_unix,
         }
 
-        signed_payload = {
-            "agent_id": body["agent_id"],
-            "command": body["command"],
-            "timestamp": body["timestamp"],
-            "ts_unix": ts_unix,
-        }
+        # _sign_payload() of {agent_id, command, timestamp, ts_unix}, written
+        # out directly (keys already in sorted order)
+        signed = (
+            f'{{"agent_id":{_json_str(body["agent_id"])},"command":{_json_str(body["command"])},'
+            f'"timestamp":{_json_str(body["timestamp"])},"ts_unix":{_json_str(ts_unix)}}}'
+        ).encode("ascii")
+        return body, ts_unix, self._sign_bytes(signed)
+
+    def analyze(self, command: Dict[str, Any], timestamp: str | None = None) -> Dict[str, Any]:
+        body, ts_unix, signature = self._signed_request(command, timestamp)
 
         headers = {
             "Content-Type": "application/json",
             "X-Timestamp-Unix": ts_unix,
-            "X-Signature": self._sign_payload(signed_payload),
+            "X-Signature": signature,
         }
 
-        resp = requests.post(
+        resp = self.session.post(
             f"{self.base_url.rstrip('/')}/analyze",
             headers=headers,
             json=body,
@@ -52,3 +68,24 @@ class SentinelAgentClient:
         )
         resp.raise_for_status()
         return resp.json()
+
+    def analyze_batch(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Submits several commands in one POST to /analyze/batch. Each item is
+        still signed on its own (the server verifies items independently).
+        Results are in command order; an item the server rejects comes back
+        as {"error": {"status_code": ..., "detail": ...}}. Identical commands
+        signed in the same second share a replay nonce, so repeats get a 409.
+        """
+        items = []
+        for command in commands:
+            body, ts_unix, signature = self._signed_request(command)
+            items.append({**body, "ts_unix": ts_unix, "signature": signature})
+
+        resp = self.session.post(
+            f"{self.base_url.rstrip('/')}/analyze/batch",
+            json={"items": items},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()["results"]
@@ -12,28 +12,45 @@ from sentinel_limits import check_behavior_limits, record_behavior_event
 from sentinel_schema import validate_action_schema
 from sentinel_ops import create_action
 from sentinel_capabilities import has_capability
+import atexit
+import heapq
+import queue
+import threading
 import time
 import hmac
 import hashlib
 import json
 import os
+import ssl
 
 OPS_PROPOSED_Q = os.getenv("OPS_PROPOSED_Q", "ops:actions:proposed").strip()
+OPS_RECORD_PREFIX = "ops:actions:record:"
 import logging
-from collections import defaultdict, deque
+from json.encoder import encode_basestring_ascii as _json_str
+from operator import itemgetter
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, Deque, Tuple, List
+from typing import Optional, Dict, Any, Tuple, List
 
 from agent_registry import suspend_agent
 from sentinel_core.risk_engine import score_action
-from sentinel_core.audit import write_audit_log as append_audit_log
+from sentinel_core.audit import write_audit_log as append_audit_log, get_audit_head, verify_audit_chain
 from sentinel_core.action_digest import canonical_action_digest
 from agent_identity import get_agent
 
-import base64
+import anyio.to_thread
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None
+
 from dotenv import load_dotenv
-from fastapi import Form, FastAPI, Header, HTTPException, Request
+from fastapi import Depends, Form, FastAPI, Header, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import ValidationError
 from pydantic import BaseModel, Field
 from ops_digest import digest_action
 import json
@@ -43,10 +60,11 @@ with open("agents.json") as f:
 
 # Policy + core
 from sentinel_rules.policy_v2 import evaluate_command_v2
-from sentinel_core.utils import variable_timestamp
+from sentinel_core.utils import canonical_json, dumps, loads, variable_timestamp
 from sentinel_core.reputation import (
     load_reputation_db,
     save_reputation_db,
+    append_reputation_journal,
     get_state,
     update_reputation,
 )
@@ -55,32 +73,19 @@ from sentinel_core.reputation import (
 from sentinel_core.replay_db import ensure_schema, check_and_set
 
 # Redis reputation helpers (your file: reputation_redis.py)
-from reputation_redis import get_rep, apply_outcome
+from reputation_redis import get_rep, apply_outcome, parse_rep, rep_key
 
 # Agent identity module (your repo file)
 from agent_identity import register_agent, get_agent, revoke_agent, suspend_agent_identity, activate_agent_identity
+from agent_identity import verify_signature_bytes, get_pubkey_and_revoked
 from queue_redis import get_queue_redis
 import secrets
 from fastapi import HTTPException
 
-import base64
-import json
-from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
-
-
-def verify_ed25519_signature(pub_b64: str, payload: dict, signature_b64: str) -> bool:
-    try:
-        msg = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
-
-        pub_bytes = base64.b64decode(pub_b64)
-        sig_bytes = base64.b64decode(signature_b64)
-
-        pub = Ed25519PublicKey.from_public_bytes(pub_bytes)
-        pub.verify(sig_bytes, msg)
-
-        return True
-    except Exception:
-        return False
+def verify_ed25519_signature(pub_b64: str, msg: bytes, signature_b64: str) -> bool:
+    # msg is the canonical_json of the signed payload; verifier objects are
+    # cached per pub key in agent_identity
+    return verify_signature_bytes(pub_b64, msg, signature_b64)
 
 # ----------------------------
 # Env / constants
@@ -100,6 +105,8 @@ if POLICY_MODE not in {"monitor", "review", "enforce"}:
 # Security
 API_KEY = os.getenv("SENTINEL_API_KEY", "").strip()
 SIGNING_SECRET = os.getenv("SENTINEL_SIGNING_SECRET", "").strip()
+# Keyed once; _sign_digest copies it so the ipad/opad schedule isn't redone
+_SIGNING_HMAC = hmac.new(SIGNING_SECRET.encode("utf-8"), digestmod="sha256")
 TIME_WINDOW_SEC = int(os.getenv("SENTINEL_TIME_WINDOW_SEC", "120").strip() or "120")
 
 # Redis replay protection (primary)
@@ -149,6 +156,10 @@ logging.basicConfig(
 )
 log = logging.getLogger("sentinel_api")
 
+# hashlib/hmac run on the linked OpenSSL; SHA extensions (SHA-NI) need >= 1.1.1
+if ssl.OPENSSL_VERSION_INFO < (1, 1, 1):
+    log.warning("%s predates 1.1.1; SHA-256 will not use CPU SHA extensions", ssl.OPENSSL_VERSION)
+
 
 # STRICT MODE sanity: refuse startup if secrets missing
 if STRICT_MODE:
@@ -163,10 +174,14 @@ if STRICT_MODE:
 # ----------------------------
 PROM_ENABLED = False
 try:
-    from prometheus_client import Counter, generate_latest, CONTENT_TYPE_LATEST
+    from prometheus_client import Counter, Gauge, generate_latest, CONTENT_TYPE_LATEST
     PROM_ENABLED = True
 except Exception:
     PROM_ENABLED = False
+try:
+    from prometheus_fastapi_instrumentator import Instrumentator  # type: ignore
+except Exception:
+    Instrumentator = None
 # Fallback text metrics (if prometheus_client not available)
 metrics = {
     "requests_total": 0,
@@ -183,39 +198,55 @@ metrics = {
 }
 agents_seen: set[str] = set()
 
-unauthorized_by_agent: Dict[str, int] = defaultdict(int)
-replay_by_agent: Dict[str, int] = defaultdict(int)
-ratelimit_by_agent: Dict[str, int] = defaultdict(int)
-deny_by_agent: Dict[str, int] = defaultdict(int)
-denied_commands: Dict[str, int] = defaultdict(int)   # ✅ FIX
-allowed_commands: Dict[str, int] = defaultdict(int)
+# Prometheus counters keyed by their metrics[] name
+_PROM_MAP: Dict[str, Any] = {}
+if PROM_ENABLED:
+    _PROM_MAP = {
+        name: Counter(f"sentinel_{name}", name.replace("_", " "))
+        for name in metrics
+        if not name.startswith("decision_")
+    }
+    # Decisions are one labelled counter; request/status counts and latency
+    # come from the instrumentator middleware when it is installed.
+    prom_decisions = Counter("sentinel_decisions_total", "Decisions by outcome", ["decision"])
+    for _d in ("allow", "deny", "review"):
+        _PROM_MAP[f"decision_{_d}_total"] = prom_decisions.labels(decision=_d)
+    prom_agents_seen = Gauge("sentinel_agents_seen", "Number of unique agents seen since startup")
+
+STATS_TOP_CAP = int(os.getenv("SENTINEL_STATS_TOP_CAP", "1000").strip() or "1000")
+
+
+class _BoundedCounts(dict):
+    """
+    defaultdict(int) holding at most 2 * cap keys: on overflow only the cap
+    largest counts are kept, so heavy hitters survive and memory stays flat.
+    """
+
+    def __init__(self, cap: int = STATS_TOP_CAP):
+        super().__init__()
+        self.cap = cap
+
+    def __missing__(self, key: str) -> int:
+        if len(self) >= 2 * self.cap:
+            keep = heapq.nlargest(self.cap, list(self.items()), key=itemgetter(1))
+            self.clear()
+            self.update(keep)
+        return 0
+
+
+unauthorized_by_agent: Dict[str, int] = _BoundedCounts()
+replay_by_agent: Dict[str, int] = _BoundedCounts()
+ratelimit_by_agent: Dict[str, int] = _BoundedCounts()
+deny_by_agent: Dict[str, int] = _BoundedCounts()
+denied_commands: Dict[str, int] = _BoundedCounts()   # ✅ FIX
+allowed_commands: Dict[str, int] = _BoundedCounts()
 
 
 def _m_inc(name: str, n: int = 1) -> None:
     if PROM_ENABLED:
-        # map names to prom counters
-        if name == "requests_total":
-            prom_requests_total.inc(n)
-        elif name == "requests_ok":
-            prom_requests_ok.inc(n)
-        elif name == "http_401_total":
-            prom_http_401_total.inc(n)
-        elif name == "http_409_total":
-            prom_http_409_total.inc(n)
-        elif name == "http_429_total":
-            prom_http_429_total.inc(n)
-        elif name == "http_503_total":
-            prom_http_503_total.inc(n)
-        elif name == "decision_allow_total":
-            prom_decision_allow_total.inc(n)
-        elif name == "decision_deny_total":
-            prom_decision_deny_total.inc(n)
-        elif name == "decision_review_total":
-            prom_decision_review_total.inc(n)
-        elif name == "replay_detected_total":
-            prom_replay_detected_total.inc(n)
-        elif name == "rate_limited_total":
-            prom_rate_limited_total.inc(n)
+        counter = _PROM_MAP.get(name)
+        if counter is not None:
+            counter.inc(n)
         return
 
     metrics[name] = int(metrics.get(name, 0)) + n
@@ -229,46 +260,214 @@ def _m_agents_seen_update() -> None:
 # ----------------------------
 # Telegram alerts
 # ----------------------------
-def send_telegram_alert(message: str) -> None:
-    token = os.getenv("TELEGRAM_BOT_TOKEN", "").strip().strip('"')
-    chat_id = os.getenv("TELEGRAM_ADMIN_CHAT", "").strip().strip('"')
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "").strip().strip('"')
+TELEGRAM_ADMIN_CHAT = os.getenv("TELEGRAM_ADMIN_CHAT", "").strip().strip('"')
+_TG_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
 
-    if not token or not chat_id:
-        return
+TG_BATCH_SEC = 2.0
+TG_BATCH_MAX = 10
+TG_TEXT_MAX = 3500
+
+# Alerts are queued by the request path and sent by one background thread,
+# coalescing up to TG_BATCH_MAX alerts per TG_BATCH_SEC into one message.
+_tg_queue: "queue.Queue[str]" = queue.Queue(maxsize=1000)
+_tg_lock = threading.Lock()
+_tg_worker: Optional[threading.Thread] = None
+
+# Keep-alive session: warm alerts skip the TCP + TLS handshake
+_TG_SESSION = requests.Session()
+_TG_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
 
+
+def _tg_post(text: str) -> None:
     try:
-        url = f"https://api.telegram.org/bot{token}/sendMessage"
         payload = {
-            "chat_id": chat_id,
-            "text": message[:3500],
+            "chat_id": TELEGRAM_ADMIN_CHAT,
+            "text": text[:TG_TEXT_MAX],
             "disable_web_page_preview": True,
         }
-        requests.post(url, json=payload, timeout=5)
+        _TG_SESSION.post(_TG_URL, data=dumps(payload), headers={"Content-Type": "application/json"}, timeout=5)
     except Exception:
         pass
 
 
+def _tg_loop() -> None:
+    while True:
+        batch = [_tg_queue.get()]
+        deadline = time.monotonic() + TG_BATCH_SEC
+        while len(batch) < TG_BATCH_MAX:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            try:
+                batch.append(_tg_queue.get(timeout=left))
+            except queue.Empty:
+                break
+
+        # Pack into as few messages as fit the text limit
+        text = ""
+        for msg in batch:
+            msg = msg[:TG_TEXT_MAX]
+            if text and len(text) + 2 + len(msg) > TG_TEXT_MAX:
+                _tg_post(text)
+                text = ""
+            text = f"{text}\n\n{msg}" if text else msg
+        if text:
+            _tg_post(text)
+
+
+def send_telegram_alert(message: str) -> None:
+    """
+    Queue an alert; never blocks the caller on Telegram. Dropped if the
+    queue is full (Telegram unreachable for a long time).
+    """
+    global _tg_worker
+    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_ADMIN_CHAT:
+        return
+
+    try:
+        _tg_queue.put_nowait(message)
+    except queue.Full:
+        return
+
+    if _tg_worker is None:
+        with _tg_lock:
+            if _tg_worker is None:
+                _tg_worker = threading.Thread(target=_tg_loop, name="telegram-alerts", daemon=True)
+                _tg_worker.start()
+
+
 # =========================
 # App
 # =========================
-app = FastAPI(title=APP_NAME, version=POLICY_VERSION)
+app = FastAPI(
+    title=APP_NAME,
+    version=POLICY_VERSION,
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse,
+)
 
 
 templates = Jinja2Templates(directory="templates")
 
+if PROM_ENABLED and Instrumentator is not None:
+    # Served by the existing /metrics route (default registry)
+    Instrumentator(excluded_handlers=["/metrics"]).instrument(app)
+
+# Sync handlers run in anyio's worker pool (40 threads by default); /analyze
+# spends most of its time waiting on Redis and disk, so allow more in flight.
+THREADPOOL_SIZE = int(os.getenv("SENTINEL_THREADPOOL_SIZE", "100").strip() or "100")
+
+
+def _size_threadpool() -> None:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+
+app.add_event_handler("startup", _size_threadpool)
+
+# ----------------------------
+# Legacy reputation DB (in-memory, journaled in background)
+# ----------------------------
+# Updated states are appended to the journal every REP_FLUSH_SEC; the full
+# snapshot is rewritten (and the journal emptied) every REP_CHECKPOINT_SEC
+# or REP_CHECKPOINT_EVERY journaled states.
+REP_FLUSH_SEC = float(os.getenv("SENTINEL_REP_FLUSH_SEC", "0.05").strip() or "0.05")
+REP_CHECKPOINT_SEC = float(os.getenv("SENTINEL_REP_CHECKPOINT_SEC", "300").strip() or "300")
+REP_CHECKPOINT_EVERY = int(os.getenv("SENTINEL_REP_CHECKPOINT_EVERY", "10000").strip() or "10000")
+
+_REP_DB = load_reputation_db()
+_REP_LOCK = threading.Lock()      # _REP_DB and _rep_pending
+_REP_IO_LOCK = threading.Lock()   # journal/snapshot files; taken before _REP_LOCK
+_rep_pending: List[Dict[str, Any]] = []
+_rep_journaled = 0  # journal lines since the last checkpoint
+_rep_checkpoint_at = time.monotonic()
+
+
+def _rep_flush() -> None:
+    global _rep_pending, _rep_journaled, _rep_checkpoint_at
+    with _REP_IO_LOCK:
+        checkpoint = (
+            _rep_journaled >= REP_CHECKPOINT_EVERY
+            or time.monotonic() - _rep_checkpoint_at >= REP_CHECKPOINT_SEC
+        )
+        with _REP_LOCK:
+            batch, _rep_pending = _rep_pending, []
+            if checkpoint and (batch or _rep_journaled):
+                snapshot = {**_REP_DB, "agents": {k: dict(v) for k, v in _REP_DB["agents"].items()}}
+            else:
+                snapshot = None
+        try:
+            if snapshot is not None:
+                save_reputation_db(snapshot)
+                _rep_journaled = 0
+                _rep_checkpoint_at = time.monotonic()
+            elif batch:
+                append_reputation_journal(batch)
+                _rep_journaled += len(batch)
+        except Exception:
+            log.exception("reputation db flush failed")
+            with _REP_LOCK:
+                _rep_pending = batch + _rep_pending
+
+
+def _rep_flush_loop() -> None:
+    while True:
+        time.sleep(REP_FLUSH_SEC)
+        _rep_flush()
+
+
+def _rep_update(agent_id: str, decision: str, now: Optional[float] = None) -> Dict[str, Any]:
+    with _REP_LOCK:
+        state = update_reputation(_REP_DB, agent_id, decision, now).copy()
+        _rep_pending.append(state)
+    return state
+
+
+def _rep_snapshot(agent_id: str) -> Dict[str, Any]:
+    """
+    Decayed copy of an agent's state; does not touch the shared DB.
+    """
+    with _REP_LOCK:
+        state = _REP_DB["agents"].get(agent_id)
+        scratch = {"agents": {agent_id: dict(state)}} if state else {}
+    return get_state(scratch, agent_id)
+
+
+threading.Thread(target=_rep_flush_loop, name="rep-flush", daemon=True).start()
+atexit.register(_rep_flush)
+app.add_event_handler("shutdown", _rep_flush)
+
+
 # ----------------------------
 # In-memory rate limiter
 # ----------------------------
-_rate_events: Dict[str, Deque[float]] = defaultdict(deque)
+# Per agent token bucket: (tokens, last refill monotonic_ns). Holds up to
+# RATE_LIMIT_MAX tokens and refills RATE_LIMIT_MAX per RATE_LIMIT_WINDOW_SEC.
+_RATE_WINDOW_NS = RATE_LIMIT_WINDOW_SEC * 1_000_000_000
+_RATE_PER_NS = RATE_LIMIT_MAX / _RATE_WINDOW_NS if _RATE_WINDOW_NS > 0 else float("inf")
+_rate_buckets: Dict[str, Tuple[float, int]] = {}
+_rate_last_sweep = 0
 
 
 def _now() -> float:
     return time.time()
 
 
-def _sign_payload(payload: dict) -> str:
-    msg = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
-    return hmac.new(SIGNING_SECRET.encode("utf-8"), msg, hashlib.sha256).hexdigest()
+def _sign_digest(msg: bytes) -> bytes:
+    h = _SIGNING_HMAC.copy()
+    h.update(msg)
+    return h.digest()
+
+
+def _sign_bytes(msg: bytes) -> str:
+    return _sign_digest(msg).hex()
+
+
+def _canon_str_fields(*pairs: Tuple[str, str]) -> bytes:
+    """
+    canonical_json() of a flat dict of str values, built directly. Keys must
+    be passed in sorted order and need no escaping.
+    """
+    return ("{" + ",".join(f'"{k}":{_json_str(v)}' for k, v in pairs) + "}").encode("ascii")
 
 
 def _require_api_key(x_api_key: Optional[str]) -> None:
@@ -285,24 +484,49 @@ def _require_timestamp_window(ts_unix: float) -> None:
         raise HTTPException(status_code=401, detail="Timestamp outside allowed window")
 
 
+def _rate_sweep(now: int) -> None:
+    # Buckets idle for a full window are back at capacity; dropping them is
+    # equivalent and bounds memory under agent churn.
+    global _rate_last_sweep
+    _rate_last_sweep = now
+    cutoff = now - _RATE_WINDOW_NS
+    for agent_id, (_, last) in list(_rate_buckets.items()):
+        if last < cutoff:
+            _rate_buckets.pop(agent_id, None)
+
+
+def _rate_tokens(agent_id: str, now: int) -> float:
+    bucket = _rate_buckets.get(agent_id)
+    if bucket is None:
+        return float(RATE_LIMIT_MAX)
+    tokens, last = bucket
+    return min(float(RATE_LIMIT_MAX), tokens + (now - last) * _RATE_PER_NS)
+
+
+def _rate_remaining(agent_id: str) -> int:
+    return int(_rate_tokens(agent_id, time.monotonic_ns()))
+
+
 def _rate_limit(agent_id: str) -> None:
     if RATE_LIMIT_MAX <= 0:
         return
-    now = _now()
-    q = _rate_events[agent_id]
-    cutoff = now - float(RATE_LIMIT_WINDOW_SEC)
-    while q and q[0] < cutoff:
-        q.popleft()
-    if len(q) >= RATE_LIMIT_MAX:
+    # Monotonic: wall-clock steps (NTP) can't drain or refill buckets
+    now = time.monotonic_ns()
+    if now - _rate_last_sweep > _RATE_WINDOW_NS:
+        _rate_sweep(now)
+    tokens = _rate_tokens(agent_id, now)
+    if tokens < 1.0:
         _m_inc("http_429_total")
         _m_inc("rate_limited_total")
         ratelimit_by_agent[agent_id] += 1
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
-    q.append(now)
+    _rate_buckets[agent_id] = (tokens - 1.0, now)
 
 
 def _top_items(d: Dict[str, int], n: int = 5) -> List[Tuple[str, int]]:
-    return sorted(d.items(), key=lambda x: x[1], reverse=True)[:n]
+    # Same order as sorted(..., reverse=True)[:n], O(N log n) instead of O(N log N)
+    # (list() snapshots the dict so request threads can keep counting)
+    return heapq.nlargest(n, list(d.items()), key=itemgetter(1))
 
 
 # ----------------------------
@@ -321,48 +545,73 @@ except Exception:
     _redis_ok = False
 
 
-def _replay_nonce(agent_id: str, command: str, ts_unix: str) -> str:
-    raw = f"{agent_id}|{command}|{ts_unix}".encode("utf-8")
-    return hashlib.sha256(raw).hexdigest()
+def _replay_nonce(signed_canon: bytes) -> str:
+    # Same canonical bytes the signature is verified over (agent_id, command,
+    # timestamp, ts_unix), so both checks share one serialization.
+    return hashlib.sha256(signed_canon).hexdigest()
+
+
+def _replay_check_and_set(signed_canon: bytes, agent_id: str = "") -> Tuple[bool, Optional[float]]:
+    """
+    Returns (True, rep) if nonce was NEW and is now stored.
+    Returns (False, rep) if nonce already seen (replay).
+    With agent_id, the agent's Redis rep score is read in the same round
+    trip as the nonce SET; rep is None when it couldn't be prefetched.
+    """
+    return _replay_check_and_set_many([(signed_canon, agent_id)])[0]
 
 
-def _replay_check_and_set(agent_id: str, command: str, ts_unix: str) -> bool:
+def _replay_check_and_set_many(items: List[Tuple[bytes, str]]) -> List[Tuple[bool, Optional[float]]]:
     """
-    Returns True if nonce was NEW and is now stored.
-    Returns False if nonce already seen (replay).
+    _replay_check_and_set for (signed_canon, agent_id) pairs, in one Redis
+    round trip.
     """
-    nonce = _replay_nonce(agent_id, command, ts_unix)
+    if not items:
+        return []
+    nonces = [_replay_nonce(canon) for canon, _ in items]
 
     # Redis primary
     if _redis_ok and _redis is not None:
-        key = f"{REPLAY_PREFIX}:{nonce}"
         try:
-            # SET key "1" NX EX TIME_WINDOW_SEC
-            ok = _redis.set(key, "1", nx=True, ex=TIME_WINDOW_SEC)
-            return bool(ok)
+            with _redis.pipeline(transaction=False) as p:
+                for nonce, (_, agent_id) in zip(nonces, items):
+                    # SET key "1" NX EX TIME_WINDOW_SEC
+                    p.set(f"{REPLAY_PREFIX}:{nonce}", "1", nx=True, ex=TIME_WINDOW_SEC)
+                    if agent_id:
+                        p.get(rep_key(agent_id))
+                res = iter(p.execute())
+            return [
+                (bool(next(res)), parse_rep(next(res)) if agent_id else None)
+                for _, agent_id in items
+            ]
         except Exception:
             # fall through to sqlite
             pass
 
     # SQLite fallback
-    return bool(check_and_set(DB_PATH, nonce, TIME_WINDOW_SEC))
+    return [(bool(check_and_set(DB_PATH, nonce, TIME_WINDOW_SEC)), None) for nonce in nonces]
 
 
 # ----------------------------
 # Audit chain helpers
 # ----------------------------
+_AUDIT_SECRET = os.getenv("SENTINEL_AUDIT_SECRET", "").strip()
+_AUDIT_HMAC = hmac.new(_AUDIT_SECRET.encode("utf-8"), digestmod="sha256") if _AUDIT_SECRET else None
+
+
 def _audit_hmac(data: str) -> str:
-    secret = os.getenv("SENTINEL_AUDIT_SECRET", "").strip()
-    if not secret:
+    if _AUDIT_HMAC is None:
         return ""
-    return hmac.new(secret.encode("utf-8"), data.encode("utf-8"), hashlib.sha256).hexdigest()
+    h = _AUDIT_HMAC.copy()
+    h.update(data.encode("utf-8"))
+    return h.hexdigest()
 
 
 
 
 def parse_and_validate_command(command_str: str) -> dict:
     try:
-        cmd = json.loads(command_str)
+        cmd = loads(command_str)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid command JSON")
 
@@ -409,10 +658,40 @@ class AnalyzeRequest(BaseModel):
     reputation: float = 0.0  # legacy input
 
 
+async def _analyze_request(request: Request) -> AnalyzeRequest:
+    # Parse + validate the raw body in one pydantic-core pass instead of
+    # json.loads followed by model validation.
+    try:
+        return AnalyzeRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+
+
+ANALYZE_BATCH_MAX = int(os.getenv("SENTINEL_ANALYZE_BATCH_MAX", "100").strip() or "100")
+
+
+class AnalyzeBatchItem(AnalyzeRequest):
+    # Per-item X-Signature / X-Timestamp-Unix
+    signature: str = ""
+    ts_unix: str = ""
+
+
+class AnalyzeBatch(BaseModel):
+    items: List[AnalyzeBatchItem] = Field(min_length=1, max_length=ANALYZE_BATCH_MAX)
+
+
+async def _analyze_batch_request(request: Request) -> AnalyzeBatch:
+    try:
+        return AnalyzeBatch.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+
+
 class AnalyzeResponse(BaseModel):
     timestamp: str
     agent_id: str
     command: str
+    action_hash: str
     decision: str
     risk: str
     reason: str
@@ -507,7 +786,7 @@ def health():
 def metrics_endpoint():
     if PROM_ENABLED:
         _m_agents_seen_update()
-        return generate_latest(), 200, {"Content-Type": CONTENT_TYPE_LATEST}
+        return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
     # fallback text format
     lines = []
@@ -536,9 +815,19 @@ def metrics_endpoint():
     return "\n".join(lines) + "\n"
 
 
+STATS_TTL_SEC = 1.0
+_stats_cache: Tuple[float, Dict[str, Any]] = (0.0, {})
+
+
 @app.get("/stats")
 def stats():
-    return {
+    # Scrapers polling faster than STATS_TTL_SEC get the same snapshot
+    global _stats_cache
+    now = time.monotonic()
+    ts, body = _stats_cache
+    if body and now - ts < STATS_TTL_SEC:
+        return body
+    body = {
         "policy_version": POLICY_VERSION,
         "strict_mode": STRICT_MODE,
         "global_freeze": GLOBAL_FREEZE,
@@ -551,6 +840,8 @@ def stats():
         "top_denied_commands": _top_items(denied_commands),
         "top_allowed_commands": _top_items(allowed_commands),
     }
+    _stats_cache = (now, body)
+    return body
 
 
 # ----------------------------
@@ -617,19 +908,21 @@ def status(
 
         _require_timestamp_window(ts_unix)
 
-        signed_payload = {"agent_id": agent_id, "ts_unix": x_timestamp_unix}
-        expected = _sign_payload(signed_payload)
-        if not hmac.compare_digest(expected, x_signature):
+        expected = _sign_digest(_canon_str_fields(("agent_id", agent_id), ("ts_unix", x_timestamp_unix)))
+        # Compare raw digests; also keeps non-ASCII headers a 401, not a TypeError
+        try:
+            got = bytes.fromhex(x_signature)
+        except ValueError:
+            got = b""
+        if not hmac.compare_digest(expected, got):
             _m_inc("http_401_total")
             raise HTTPException(status_code=401, detail="Bad signature")
 
-    db = load_reputation_db()
-    rep_state = get_state(db, agent_id)
+    rep_state = _rep_snapshot(agent_id)
     rep_score = get_rep(agent_id)
 
-    q = _rate_events.get(agent_id, [])
-    recent = len(q)
-    remaining = max(RATE_LIMIT_MAX - recent, 0)
+    remaining = _rate_remaining(agent_id)
+    recent = max(RATE_LIMIT_MAX - remaining, 0)
 
     return {
         "agent_id": agent_id,
@@ -858,17 +1151,96 @@ def simulate(req: AnalyzeRequest):
 # ----------------------------
 # Route: analyze (main)
 # ----------------------------
-@app.post("/analyze")
+@app.post(
+    "/analyze",
+    response_model=AnalyzeResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": AnalyzeRequest.model_json_schema()}},
+        }
+    },
+)
 def analyze(
-    req: AnalyzeRequest,
     request: Request,
+    req: AnalyzeRequest = Depends(_analyze_request),
     x_api_key: Optional[str] = Header(default=None),
     x_signature: Optional[str] = Header(default=None),
     x_timestamp_unix: Optional[str] = Header(default=None),
 ):
+    signed_canon = _analyze_admit(req, x_signature, x_timestamp_unix)
+    replay = _replay_check_and_set(signed_canon, req.agent_id) if signed_canon is not None else (True, None)
+    return Response(
+        content=_analyze_decide(request, req, signed_canon, x_signature, replay),
+        media_type="application/json",
+    )
 
-    action_digest = canonical_action_digest(req.command)
 
+@app.post(
+    "/analyze/batch",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": AnalyzeBatch.model_json_schema()}},
+        }
+    },
+)
+def analyze_batch(
+    request: Request,
+    batch: AnalyzeBatch = Depends(_analyze_batch_request),
+    x_api_key: Optional[str] = Header(default=None),
+):
+    """
+    {"items": [AnalyzeRequest + signature/ts_unix, ...]} -> {"results": [...]}
+    in item order. Each result is the /analyze response body, or
+    {"error": {"status_code", "detail"}} for an item /analyze would reject.
+    All replay nonces go to Redis in one pipeline.
+    """
+    results: List[bytes] = [b""] * len(batch.items)
+
+    admitted = []
+    for i, item in enumerate(batch.items):
+        try:
+            admitted.append((i, item, _analyze_admit(item, item.signature or None, item.ts_unix or None)))
+        except HTTPException as e:
+            results[i] = _analyze_error(e)
+
+    replays = iter(_replay_check_and_set_many(
+        [(canon, item.agent_id) for _, item, canon in admitted if canon is not None]
+    ))
+    seen = set()
+    for i, item, canon in admitted:
+        replay = next(replays) if canon is not None else (True, None)
+        if item.agent_id in seen:
+            # Earlier items already moved this agent's rep; the prefetched
+            # value is stale, so re-read it rather than skip the rep gate
+            replay = (replay[0], None)
+        seen.add(item.agent_id)
+        try:
+            results[i] = _analyze_decide(request, item, canon, item.signature, replay)
+        except HTTPException as e:
+            results[i] = _analyze_error(e)
+        except ValueError as e:
+            # Schema errors; one bad item must not fail the items around it
+            results[i] = _analyze_error(HTTPException(status_code=400, detail=str(e)))
+
+    return Response(content=b'{"results":[' + b",".join(results) + b"]}", media_type="application/json")
+
+
+def _analyze_error(e: HTTPException) -> bytes:
+    return dumps({"error": {"status_code": e.status_code, "detail": e.detail}})
+
+
+def _analyze_admit(
+    req: AnalyzeRequest,
+    x_signature: Optional[str],
+    x_timestamp_unix: Optional[str],
+) -> Optional[bytes]:
+    """
+    Checks that run before the replay nonce is spent: freeze, rate limit,
+    signature headers, timestamp window. Returns the signed canonical bytes,
+    or None in unsigned mode.
+    """
     _m_inc("requests_total")
     agents_seen.add(req.agent_id)
     _m_agents_seen_update()
@@ -880,50 +1252,65 @@ def analyze(
     _rate_limit(req.agent_id)
 
     # Signed mode: require signature headers if secret is set
-    if SIGNING_SECRET:
-        if not x_signature or not x_timestamp_unix:
-            _m_inc("http_401_total")
-            unauthorized_by_agent[req.agent_id] += 1
-            raise HTTPException(status_code=401, detail="Missing signature headers")
+    if not SIGNING_SECRET:
+        return None
 
-        try:
-            ts_unix = float(x_timestamp_unix)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Bad X-Timestamp-Unix")
+    if not x_signature or not x_timestamp_unix:
+        _m_inc("http_401_total")
+        unauthorized_by_agent[req.agent_id] += 1
+        raise HTTPException(status_code=401, detail="Missing signature headers")
+
+    try:
+        ts_unix = float(x_timestamp_unix)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Bad X-Timestamp-Unix")
+
+    _require_timestamp_window(ts_unix)
+
+    return _canon_str_fields(
+        ("agent_id", req.agent_id),
+        ("command", req.command),
+        ("timestamp", req.timestamp),
+        ("ts_unix", x_timestamp_unix),
+    )
 
-        _require_timestamp_window(ts_unix)
 
-        # Replay check (Redis primary)
-        ok_nonce = _replay_check_and_set(req.agent_id, req.command, x_timestamp_unix)
+def _analyze_decide(
+    request: Request,
+    req: AnalyzeRequest,
+    signed_canon: Optional[bytes],
+    x_signature: Optional[str],
+    replay: Tuple[bool, Optional[float]],
+) -> bytes:
+    """
+    Everything after the replay check; returns the signed response body.
+    """
+    ok_nonce, rep_prefetched = replay
+
+    if signed_canon is not None:
         if not ok_nonce:
             _m_inc("http_409_total")
             _m_inc("replay_detected_total")
             replay_by_agent[req.agent_id] += 1
             raise HTTPException(status_code=409, detail="Replay detected")
 
-        from agent_identity import get_agent
-        agent_info = get_agent(req.agent_id)
+        agent_key = get_pubkey_and_revoked(req.agent_id)
 
-        if not agent_info:
+        if not agent_key:
             raise HTTPException(status_code=401, detail="Unknown agent")
 
-        if agent_info.get("revoked"):
+        pub_b64, revoked = agent_key
+        if revoked:
             raise HTTPException(status_code=403, detail="Agent revoked")
 
-        pub_b64 = agent_info["pub_b64"]
-
         # Verify signature
-        signed_payload = {
-            "agent_id": req.agent_id,
-            "command": req.command,
-            "timestamp": req.timestamp,
-            "ts_unix": x_timestamp_unix,
-        }
-        if not verify_ed25519_signature(pub_b64, signed_payload, x_signature):
+        if not verify_ed25519_signature(pub_b64, signed_canon, x_signature):
             _m_inc("http_401_total")
             unauthorized_by_agent[req.agent_id] += 1
             raise HTTPException(status_code=401, detail="Bad signature")
 
+    action_digest = canonical_action_digest(req.command)
+
     validated_command = parse_and_validate_command(req.command)
     validated_command = validate_action_schema(validated_command)
     action_hash = deterministic_action_hash(req.agent_id, validated_command)
@@ -942,8 +1329,9 @@ def analyze(
         action_type_for_limits = str(validated_command.get("type", "")).strip()
 
     # Legacy local reputation state
-    db = load_reputation_db()
-    rep_before = get_state(db, req.agent_id).copy()
+    rep_now = time.time()  # one clock reading for the legacy rep before/after
+    with _REP_LOCK:
+        rep_before = get_state(_REP_DB, req.agent_id, rep_now).copy()
 
     # Policy decision
     if capability and not has_capability(req.agent_id, capability):
@@ -960,7 +1348,7 @@ def analyze(
     score = float(score)
 
     # Redis rep gate (only if policy would allow)
-    rep_score_before = get_rep(req.agent_id)
+    rep_score_before = rep_prefetched if rep_prefetched is not None else get_rep(req.agent_id)
     if decision == "allow":
         if rep_score_before < REP_AUTO_DENY:
             decision = "deny"
@@ -980,11 +1368,10 @@ def analyze(
     if decision == "review":
         try:
             import hashlib
-            import time
-            now = int(time.time())
+            now = int(rep_now)
 
             try:
-                parsed = json.loads(req.command) if isinstance(req.command, str) else {}
+                parsed = loads(req.command) if isinstance(req.command, str) else {}
             except Exception:
                 parsed = {}
 
@@ -1009,10 +1396,12 @@ def analyze(
                 "status": "proposed",
             }
 
-            r = get_queue_redis()
-            record_key = f"ops:actions:record:{action_id}"
-            r.setex(record_key, 86400, json.dumps(msg, separators=(",", ":")))
-            r.rpush(OPS_PROPOSED_Q, action_id)
+            # Record + enqueue in one MULTI/EXEC: consumers never see an id
+            # whose record is missing.
+            with get_queue_redis().pipeline(transaction=True) as p:
+                p.setex(OPS_RECORD_PREFIX + action_id, 86400, dumps(msg))
+                p.rpush(OPS_PROPOSED_Q, action_id)
+                p.execute()
 
             print("ENQUEUE_REVIEW ok:", action_id, flush=True)
         except Exception as e:
@@ -1032,8 +1421,7 @@ def analyze(
         _m_inc("decision_review_total")
 
     # Update legacy rep state
-    rep_after = update_reputation(db, req.agent_id, decision)
-    save_reputation_db(db)
+    rep_after = _rep_update(req.agent_id, decision, rep_now)
 
     # Update Redis rep
     rep_score_after = rep_score_before
@@ -1075,7 +1463,9 @@ def analyze(
     except Exception:
         pass
 
-    resp_sig = _sign_payload(body) if SIGNING_SECRET else ""
+    # Serialized once: the signed canonical bytes are also the response body
+    resp_canon = canonical_json(body)
+    resp_sig = _sign_bytes(resp_canon) if SIGNING_SECRET else ""
 
     _m_inc("requests_ok")
 
@@ -1102,7 +1492,7 @@ def analyze(
         "action_digest": action_digest
     })
 
-    return AnalyzeResponse(**body, signature=resp_sig)
+    return b'{"signature":"' + resp_sig.encode("ascii") + b'",' + resp_canon[1:]
 
 @app.get("/telemetry", include_in_schema=False)
 def telemetry():
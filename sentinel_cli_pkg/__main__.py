@@ -5,6 +5,7 @@ Usage:
   ./venv/bin/python sentinel_cli.py "ls"
   ./venv/bin/python sentinel_cli.py "rm -rf /" --agent-id "cli:habibu"
   echo "ls" | ./venv/bin/python sentinel_cli.py --stdin
+  ./venv/bin/python sentinel_cli.py --batch commands.jsonl   # one {"command": ...} per line
 
 Exit codes:
   0 = allow
@@ -18,7 +19,6 @@ import sys
 import json
 import time
 import hmac
-import hashlib
 import argparse
 from typing import Any, Dict
 
@@ -33,7 +33,7 @@ def canonical_json(obj: Dict[str, Any]) -> bytes:
 
 def sign_payload(secret: str, payload: Dict[str, Any]) -> str:
     msg = canonical_json(payload)
-    return hmac.new(secret.encode(), msg, hashlib.sha256).hexdigest()
+    return hmac.digest(secret.encode(), msg, "sha256").hex()
 
 
 def exit_code_for_decision(decision: str) -> int:
@@ -47,6 +47,56 @@ def exit_code_for_decision(decision: str) -> int:
     return 1
 
 
+def run_batch(args: argparse.Namespace, session: requests.Session, api_key: str, signing_secret: str) -> int:
+    """
+    Sign every line of args.batch and send them in one POST to <api-url>/batch.
+    Exit code is the most severe of the item outcomes (error > deny > review).
+    """
+    items = []
+    with open(args.batch, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            ts_unix = str(int(time.time()))
+            item = {
+                "agent_id": entry.get("agent_id", args.agent_id),
+                "command": entry["command"],
+                "timestamp": entry.get("timestamp", args.timestamp),
+            }
+            item["signature"] = sign_payload(signing_secret, {**item, "ts_unix": ts_unix})
+            item["ts_unix"] = ts_unix
+            items.append(item)
+
+    headers = {"Content-Type": "application/json", "X-API-Key": api_key}
+    try:
+        r = session.post(args.api_url.rstrip("/") + "/batch", json={"items": items}, headers=headers, timeout=args.timeout)
+        data = r.json()
+    except Exception as e:
+        print(f"ERROR: batch request failed: {e}", file=sys.stderr)
+        return 1
+
+    if r.status_code != 200:
+        print(f"HTTP {r.status_code}: {data.get('detail', data)}")
+        return 1
+
+    codes = set()
+    for item, res in zip(items, data.get("results", [])):
+        if args.json:
+            print(json.dumps(res, sort_keys=True))
+        elif "error" in res:
+            print(f"ERROR {res['error'].get('status_code')}: {res['error'].get('detail')}  [{item['command'][:80]}]")
+        else:
+            print(f"{res.get('decision', 'unknown').upper():7} {res.get('risk', 'unknown'):7} {item['command'][:80]}")
+        codes.add(1 if "error" in res else exit_code_for_decision(res.get("decision", "")))
+
+    for code in (1, 2, 3):
+        if code in codes:
+            return code
+    return 0
+
+
 def main() -> int:
     load_dotenv(dotenv_path=".env")
 
@@ -58,6 +108,7 @@ def main() -> int:
     parser.add_argument("--api-url", default=os.getenv("SENTINEL_API_URL", "http://127.0.0.1:8000/analyze"))
     parser.add_argument("--timeout", type=int, default=int(os.getenv("SENTINEL_HTTP_TIMEOUT", "10")))
     parser.add_argument("--json", action="store_true", help="Print raw JSON response")
+    parser.add_argument("--batch", metavar="FILE", help="JSONL file of commands to analyze in one request")
     args = parser.parse_args()
 
     api_key = os.getenv("SENTINEL_API_KEY", "").strip()
@@ -70,6 +121,11 @@ def main() -> int:
         print("ERROR: SENTINEL_SIGNING_SECRET is missing in .env", file=sys.stderr)
         return 1
 
+    session = requests.Session()
+
+    if args.batch:
+        return run_batch(args, session, api_key, signing_secret)
+
     if args.stdin:
         cmd = (sys.stdin.read() or "").strip()
     else:
@@ -104,7 +160,7 @@ def main() -> int:
     }
 
     try:
-        r = requests.post(args.api_url, json=body, headers=headers, timeout=args.timeout)
+        r = session.post(args.api_url, json=body, headers=headers, timeout=args.timeout)
     except Exception as e:
         print(f"ERROR: cannot reach Sentinel API: {e}", file=sys.stderr)
         return 1
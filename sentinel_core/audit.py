@@ -1,8 +1,13 @@
+import atexit
 import json
+import logging
 import os
+import threading
 import time
 import hashlib
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+
+from sentinel_core.utils import loads
 
 AUDIT_DIR = "/app/audit"
 AUDIT_FILE = os.path.join(AUDIT_DIR, "audit.jsonl")
@@ -12,46 +17,215 @@ def ensure_audit_dir():
     os.makedirs(AUDIT_DIR, exist_ok=True)
 
 
+# Lines are written as the exact hashed bytes with the hash spliced in:
+#   <json.dumps(record) minus "}"> + ', "hash": "<hex>"}'
+# so verification hashes the stored prefix instead of re-serializing. Key
+# order is therefore free; records keep their insertion order (ts, event,
+# prev_hash, then the payload as the caller built it).
+_HASH_SEP = b', "hash": "'
+_TAIL_CHUNK = 64 * 1024
+
+# Buffered writer: records are chained in memory and appended by one thread
+# in batches (one write + fsync per batch). Assumes this process is the
+# only writer of AUDIT_FILE.
+AUDIT_FLUSH_SEC = float(os.getenv("SENTINEL_AUDIT_FLUSH_SEC", "0.1"))
+AUDIT_BATCH_MAX = int(os.getenv("SENTINEL_AUDIT_BATCH_MAX", "64"))
+
+_lock = threading.Lock()
+_io_lock = threading.Lock()
+_wake = threading.Condition(_lock)
+_pending: List[bytes] = []
+_head: Optional[str] = None
+_head_loaded = False
+_fd: Optional[int] = None
+_writer: Optional[threading.Thread] = None
+
+log = logging.getLogger("sentinel_core.audit")
+
+
+def _tail_line() -> bytes | None:
+    """
+    Last non-empty line of the audit log, read from the end of the file.
+    """
+    try:
+        with open(AUDIT_FILE, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            buf = b""
+            pos = end
+            while pos > 0:
+                step = min(_TAIL_CHUNK, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+                stripped = buf.rstrip()
+                nl = stripped.rfind(b"\n")
+                if nl >= 0:
+                    return stripped[nl + 1:].strip() or None
+            return buf.strip() or None
+    except OSError:
+        return None
+
+
 def _last_hash() -> str | None:
     """
     Return hash of the last non-empty record in the audit log.
     """
-    if not os.path.exists(AUDIT_FILE):
+    raw = _tail_line()
+    if not raw:
         return None
-
     try:
-        with open(AUDIT_FILE, "rb") as f:
-            lines = f.read().splitlines()
-        for raw in reversed(lines):
-            raw = raw.strip()
-            if not raw:
-                continue
-            rec = json.loads(raw.decode("utf-8"))
-            return rec.get("hash")
+        return loads(raw).get("hash")
     except Exception:
         return None
 
-    return None
 
 def _hash_record(rec: Dict[str, Any]) -> str:
     data = json.dumps(rec, sort_keys=True).encode()
     return hashlib.sha256(data).hexdigest()
 
 
+def _line_hash_ok(line: bytes, expected: str) -> bool:
+    """
+    Spliced lines are checked by hashing their stored prefix; older
+    (insertion-ordered) lines fall back to re-serializing the record.
+    """
+    cut = line.rfind(_HASH_SEP)
+    if cut > 0:
+        # Feed the stored prefix and the closing brace without copying the line.
+        h = hashlib.sha256(memoryview(line)[:cut])
+        h.update(b"}")
+        if h.hexdigest() == expected:
+            return True
+    try:
+        rec = loads(line)
+    except Exception:
+        return False
+    rec.pop("hash", None)
+    return _hash_record(rec) == expected
+
+
+def flush_audit_log() -> None:
+    """
+    Write out any buffered records now (also runs at exit).
+    """
+    global _fd
+    # _io_lock keeps batches in order; _lock is only held for the swap, so
+    # writers never wait on the fsync.
+    with _io_lock:
+        with _lock:
+            if not _pending:
+                return
+            batch = _pending[:]
+            _pending.clear()
+        view = memoryview(b"".join(batch))
+        try:
+            if _fd is None:
+                ensure_audit_dir()
+                _fd = os.open(AUDIT_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+            while view:
+                view = view[os.write(_fd, view):]
+        except BaseException:
+            # _head already chains past these records: put back whatever did
+            # not reach the file, ahead of anything queued since
+            with _lock:
+                _pending.insert(0, bytes(view))
+            raise
+        os.fsync(_fd)
+
+
+def _writer_loop() -> None:
+    # Flush AUDIT_FLUSH_SEC after the first pending record, or as soon as
+    # AUDIT_BATCH_MAX records are queued.
+    while True:
+        with _wake:
+            while not _pending:
+                _wake.wait()
+            deadline = time.monotonic() + AUDIT_FLUSH_SEC
+            while len(_pending) < AUDIT_BATCH_MAX:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                _wake.wait(left)
+        try:
+            flush_audit_log()
+        except Exception:
+            # Records stay queued; back off instead of spinning on e.g. ENOSPC
+            log.exception("audit flush failed, retrying")
+            time.sleep(1.0)
+
+
+def _load_head() -> None:
+    # Caller holds _lock; the file tail is read once per process
+    global _head, _head_loaded
+    if not _head_loaded:
+        _head = _last_hash()
+        _head_loaded = True
+
+
+def get_audit_head() -> Dict[str, Any]:
+    """
+    Hash of the newest audit record, including ones still pending flush.
+    """
+    with _lock:
+        _load_head()
+        return {"head": _head}
+
+
 def write_audit_log(event_type: str, payload: Dict[str, Any]):
-    ensure_audit_dir()
+    global _head, _writer
 
-    prev_hash = _last_hash()
+    with _lock:
+        _load_head()
 
-    record = {
-        "ts": int(time.time()),
-        "event": event_type,
-        "prev_hash": prev_hash,
-        **payload,
-    }
+        record = {
+            "ts": int(time.time()),
+            "event": event_type,
+            "prev_hash": _head,
+            **payload,
+        }
 
-    record_hash = _hash_record(record)
-    record["hash"] = record_hash
+        data = json.dumps(record).encode()
+        record_hash = hashlib.sha256(data).hexdigest()
+
+        _pending.append(data[:-1] + _HASH_SEP + record_hash.encode() + b'"}\n')
+        _head = record_hash
+
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name="audit-writer", daemon=True)
+            _writer.start()
+        if len(_pending) == 1 or len(_pending) >= AUDIT_BATCH_MAX:
+            _wake.notify()
+
+
+atexit.register(flush_audit_log)
+
+
+def verify_audit_chain() -> Dict[str, Any]:
+    """
+    Walk the audit log checking each record's hash and prev_hash link.
+    """
+    flush_audit_log()
+    if not os.path.exists(AUDIT_FILE):
+        return {"ok": True, "records": 0, "head": None}
+
+    prev = None
+    count = 0
+    with open(AUDIT_FILE, "rb") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = loads(line)
+            except Exception:
+                return {"ok": False, "records": count, "line": lineno, "error": "bad_json"}
+            if count and rec.get("prev_hash") != prev:
+                return {"ok": False, "records": count, "line": lineno, "error": "broken_link"}
+            h = rec.get("hash")
+            if not h or not _line_hash_ok(line, h):
+                return {"ok": False, "records": count, "line": lineno, "error": "bad_hash"}
+            prev = h
+            count += 1
 
-    with open(AUDIT_FILE, "a") as f:
-        f.write(json.dumps(record) + "\n")
+    return {"ok": True, "records": count, "head": prev}
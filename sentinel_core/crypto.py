@@ -1,9 +1,25 @@
 import hmac
 import hashlib
+from functools import lru_cache
 
 def sha256_hex(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
+@lru_cache(maxsize=16)
+def hmac_proto(secret: str) -> "hmac.HMAC":
+    # Keyed once per secret; callers .copy() it so the key schedule
+    # (ipad/opad blocks) isn't recomputed per message
+    return hmac.new(secret.encode("utf-8"), digestmod="sha256")
+
 def hmac_sha256_hex(secret: str, message: str) -> str:
-    return hmac.new(secret.encode("utf-8"), message.encode("utf-8"), hashlib.sha256).hexdigest()
+    h = hmac_proto(secret).copy()
+    h.update(message.encode("utf-8"))
+    return h.hexdigest()
 
+def agent_id_from_pub_bytes(pub_bytes: bytes) -> str:
+    # Shared agent ID scheme: sha256 over the raw (decoded) public key.
+    # hashlib's sha256 is OpenSSL-backed (SHA-NI where the CPU has it); the
+    # scheme deliberately does not switch on optional packages like blake3,
+    # since IDs must be identical on every host. Only the 8-byte prefix is
+    # hex-encoded (== hexdigest()[:16]).
+    return f"agent_{hashlib.sha256(pub_bytes).digest()[:8].hex()}"
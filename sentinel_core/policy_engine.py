@@ -1,31 +1,35 @@
 from sentinel_core.decision import Decision, Risk
 from sentinel_rules.core_rules import HIGH_RISK_COMMANDS, MEDIUM_RISK_KEYWORDS
+from sentinel_rules._matcher import KeywordMatcher
 
 POLICY_VERSION = "v1"
 
+_HIGH_RISK = KeywordMatcher(HIGH_RISK_COMMANDS)
+_MEDIUM_RISK = KeywordMatcher(MEDIUM_RISK_KEYWORDS)
+
 
 def evaluate(command: str) -> dict:
     cmd = command.lower()
 
     # High risk — hard block
-    for bad in HIGH_RISK_COMMANDS:
-        if bad in cmd:
-            return {
-                "decision": Decision.BLOCKED,
-                "risk": Risk.CRITICAL,
-                "reason": f"Command matches high-risk pattern: {bad}",
-                "policy_version": POLICY_VERSION,
-            }
+    bad = _HIGH_RISK.first(cmd)
+    if bad is not None:
+        return {
+            "decision": Decision.BLOCKED,
+            "risk": Risk.CRITICAL,
+            "reason": f"Command matches high-risk pattern: {bad}",
+            "policy_version": POLICY_VERSION,
+        }
 
     # Medium risk — warn
-    for keyword in MEDIUM_RISK_KEYWORDS:
-        if keyword in cmd:
-            return {
-                "decision": Decision.WARN,
-                "risk": Risk.MEDIUM,
-                "reason": f"Command contains elevated keyword: {keyword}",
-                "policy_version": POLICY_VERSION,
-            }
+    keyword = _MEDIUM_RISK.first(cmd)
+    if keyword is not None:
+        return {
+            "decision": Decision.WARN,
+            "risk": Risk.MEDIUM,
+            "reason": f"Command contains elevated keyword: {keyword}",
+            "policy_version": POLICY_VERSION,
+        }
 
     # Default safe
     return {
@@ -1,10 +1,20 @@
 import os
 import sqlite3
+import threading
 import time
-from typing import Optional
+from typing import Dict, Optional
 
 DEFAULT_DB_PATH = os.getenv("SENTINEL_DB_PATH", "sentinel.db")
 
+# Expired nonces are swept at most this often; check_and_set treats an
+# expired row as free, so sweeping is only about table size.
+CLEANUP_EVERY_SEC = 60.0
+
+# One warm connection per (thread, path); sqlite3 keeps each connection's
+# prepared statements in its statement cache.
+_TLS = threading.local()
+_last_cleanup: Dict[str, float] = {}
+
 
 def _connect(db_path: str) -> sqlite3.Connection:
     conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
@@ -13,6 +23,20 @@ def _connect(db_path: str) -> sqlite3.Connection:
     return conn
 
 
+def _conn(db_path: str) -> sqlite3.Connection:
+    conns = getattr(_TLS, "conns", None)
+    if conns is None:
+        conns = _TLS.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = _connect(db_path)
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        conn.execute("PRAGMA cache_size=-20000;")
+        conn.execute("PRAGMA mmap_size=268435456;")
+        conns[db_path] = conn
+    return conn
+
+
 def ensure_schema(db_path: Optional[str] = None) -> str:
     path = db_path or DEFAULT_DB_PATH
     conn = _connect(path)
@@ -33,13 +57,10 @@ def ensure_schema(db_path: Optional[str] = None) -> str:
 
 
 def cleanup(db_path: str, older_than_unix: float) -> int:
-    conn = _connect(db_path)
-    try:
-        cur = conn.execute("DELETE FROM replay_nonces WHERE created_at < ?", (older_than_unix,))
-        conn.commit()
-        return int(cur.rowcount or 0)
-    finally:
-        conn.close()
+    conn = _conn(db_path)
+    cur = conn.execute("DELETE FROM replay_nonces WHERE created_at < ?", (older_than_unix,))
+    conn.commit()
+    return int(cur.rowcount or 0)
 
 
 def check_and_set(db_path: str, nonce: str, ttl_seconds: int) -> bool:
@@ -50,16 +71,18 @@ def check_and_set(db_path: str, nonce: str, ttl_seconds: int) -> bool:
     now = time.time()
     cutoff = now - float(ttl_seconds)
 
-    conn = _connect(db_path)
-    try:
-        # cleanup old nonces
-        conn.execute("DELETE FROM replay_nonces WHERE created_at < ?", (cutoff,))
+    if now - _last_cleanup.get(db_path, 0.0) >= CLEANUP_EVERY_SEC:
+        _last_cleanup[db_path] = now
+        cleanup(db_path, cutoff)
 
-        try:
-            conn.execute("INSERT INTO replay_nonces(nonce, created_at) VALUES(?, ?)", (nonce, now))
-            conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False
-    finally:
-        conn.close()
+    conn = _conn(db_path)
+    # New nonce, or one whose previous use has expired (not yet swept):
+    # either way it is (re)claimed and rowcount is 1.
+    cur = conn.execute(
+        "INSERT INTO replay_nonces(nonce, created_at) VALUES(?, ?) "
+        "ON CONFLICT(nonce) DO UPDATE SET created_at = excluded.created_at "
+        "WHERE replay_nonces.created_at < ?",
+        (nonce, now, cutoff),
+    )
+    conn.commit()
+    return cur.rowcount == 1
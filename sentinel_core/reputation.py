@@ -1,10 +1,25 @@
 import json
 import os
 import time
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+
+try:
+    import msgpack  # type: ignore
+    import zstandard  # type: ignore
+except Exception:
+    msgpack = None
+    zstandard = None
 
 # Reputation DB file (simple + durable)
 REPUTATION_DB_PATH = os.getenv("SENTINEL_REPUTATION_DB", "reputation.json")
+# Compact snapshot (msgpack + zstd), used when both libs are installed.
+# SENTINEL_REP_SNAPSHOT_JSON=1 keeps writing readable JSON for debugging.
+REPUTATION_SNAPSHOT_PATH = REPUTATION_DB_PATH + ".msgpack.zst"
+SNAPSHOT_JSON = os.getenv("SENTINEL_REP_SNAPSHOT_JSON", "0") == "1"
+_BINARY_SNAPSHOT = msgpack is not None and not SNAPSHOT_JSON
+# Agent states written since the last snapshot, one JSON object per line;
+# replayed over the snapshot on load and emptied by save_reputation_db.
+REPUTATION_JOURNAL_PATH = REPUTATION_DB_PATH + ".journal"
 
 # Decay settings:
 # - Every DECAY_PERIOD_SEC, reputation moves STEP toward 0 (so -10 -> -9 -> ... -> 0)
@@ -29,51 +44,130 @@ def _decay_value(rep: int, elapsed_sec: float) -> int:
         rep = min(0, rep + steps * DECAY_STEP)
     return rep
 
-def _apply_decay(state: Dict[str, Any]) -> Dict[str, Any]:
+def _apply_decay(state: Dict[str, Any], now: Optional[float] = None) -> Dict[str, Any]:
     """Apply decay in-place based on updated_at."""
-    updated_at = float(state.get("updated_at", 0.0) or 0.0)
+    rep = state.get("reputation") or 0
+    if not rep or DECAY_PERIOD_SEC <= 0 or DECAY_STEP <= 0:
+        # nothing to decay toward 0
+        return state
+
+    updated_at = float(state.get("updated_at") or 0.0)
     if updated_at <= 0:
         # first time; nothing to decay yet
         return state
 
-    elapsed = _now() - updated_at
-    if elapsed <= 0:
+    if now is None:
+        now = _now()
+    elapsed = now - updated_at
+    if elapsed < DECAY_PERIOD_SEC:
+        # common case: not a full period yet
         return state
 
-    rep = int(state.get("reputation", 0) or 0)
-    decayed = _decay_value(rep, elapsed)
-
+    decayed = _decay_value(int(rep), elapsed)
     if decayed != rep:
         state["reputation"] = decayed
         # IMPORTANT: bump updated_at so we don't keep decaying the same elapsed window repeatedly
-        state["updated_at"] = _now()
+        state["updated_at"] = now
 
     return state
 
-def load_reputation_db() -> Dict[str, Any]:
-    """Load db from JSON file. If missing, return empty db."""
-    if not os.path.exists(REPUTATION_DB_PATH):
-        return {"_meta": {"version": 1}, "agents": {}}
-
+def _load_snapshot() -> Optional[Dict[str, Any]]:
+    if msgpack is None or not os.path.exists(REPUTATION_SNAPSHOT_PATH):
+        return None
+    if os.path.exists(REPUTATION_DB_PATH) and (
+        os.path.getmtime(REPUTATION_DB_PATH) > os.path.getmtime(REPUTATION_SNAPSHOT_PATH)
+    ):
+        # JSON was written after the binary one (e.g. SNAPSHOT_JSON toggled)
+        return None
     try:
-        with open(REPUTATION_DB_PATH, "r", encoding="utf-8") as f:
-            db = json.load(f)
+        with open(REPUTATION_SNAPSHOT_PATH, "rb") as f:
+            raw = zstandard.ZstdDecompressor().decompress(f.read())
+        return msgpack.unpackb(raw, raw=False)
     except Exception:
-        # If file is corrupted, fail safe to empty (you can also raise)
-        db = {"_meta": {"version": 1}, "agents": {}}
+        return None
+
+def load_reputation_db() -> Dict[str, Any]:
+    """Load db from the snapshot (binary, else JSON) plus journal. If missing, return empty db."""
+    db = {"_meta": {"version": 1}, "agents": {}}
+    snap = _load_snapshot()
+    if snap is not None:
+        db = snap
+    elif os.path.exists(REPUTATION_DB_PATH):
+        try:
+            with open(REPUTATION_DB_PATH, "r", encoding="utf-8") as f:
+                db = json.load(f)
+        except Exception:
+            # If file is corrupted, fail safe to empty (you can also raise)
+            db = {"_meta": {"version": 1}, "agents": {}}
 
     if "agents" not in db or not isinstance(db["agents"], dict):
         db["agents"] = {}
 
+    _replay_journal(db)
     return db
 
-def save_reputation_db(db: Dict[str, Any]) -> None:
-    tmp = REPUTATION_DB_PATH + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(db, f, indent=2, sort_keys=True)
-    os.replace(tmp, REPUTATION_DB_PATH)
+def _replay_journal(db: Dict[str, Any]) -> None:
+    try:
+        f = open(REPUTATION_JOURNAL_PATH, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                state = json.loads(line)
+            except ValueError:
+                # torn last line from a crash mid-append
+                continue
+            if not isinstance(state, dict) or not state.get("agent_id"):
+                continue
+            # A crash between snapshot replace and truncate leaves entries the
+            # snapshot already covers; never let them roll a state back
+            cur = db["agents"].get(state["agent_id"])
+            try:
+                stale = cur and float(cur.get("updated_at") or 0.0) > float(state.get("updated_at") or 0.0)
+            except (TypeError, ValueError):
+                stale = False
+            if stale:
+                continue
+            db["agents"][state["agent_id"]] = state
+
+def append_reputation_journal(states: List[Dict[str, Any]]) -> None:
+    """Durably append agent states (one write + fsync for the batch)."""
+    if not states:
+        return
+    data = "".join(json.dumps(st, separators=(",", ":")) + "\n" for st in states).encode("utf-8")
+    fd = os.open(REPUTATION_JOURNAL_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
-def get_state(db: Dict[str, Any], agent_id: str) -> Dict[str, Any]:
+def save_reputation_db(db: Dict[str, Any]) -> None:
+    if _BINARY_SNAPSHOT:
+        path = REPUTATION_SNAPSHOT_PATH
+        tmp = path + ".tmp"
+        buf = msgpack.packb(db, use_bin_type=True)
+        with open(tmp, "wb") as f:
+            f.write(zstandard.ZstdCompressor(level=3).compress(buf))
+    else:
+        path = REPUTATION_DB_PATH
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(db, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    # The other format is left in place (a JSON file stays the fallback for
+    # hosts without msgpack/zstandard); load prefers whichever is newer
+    # The snapshot now covers everything journaled so far
+    try:
+        os.truncate(REPUTATION_JOURNAL_PATH, 0)
+    except FileNotFoundError:
+        pass
+
+def get_state(db: Dict[str, Any], agent_id: str, now: Optional[float] = None) -> Dict[str, Any]:
+    """`now` lets a caller use one clock reading for a whole request."""
+    if now is None:
+        now = _now()
     agents = db.setdefault("agents", {})
     state = agents.get(agent_id)
 
@@ -85,22 +179,26 @@ def get_state(db: Dict[str, Any], agent_id: str) -> Dict[str, Any]:
             "blocked": 0,
             "reviewed": 0,
             "last_decision": "unknown",
-            "updated_at": _now(),
+            "updated_at": now,
         }
         agents[agent_id] = state
 
     # Apply decay on read
-    _apply_decay(state)
+    _apply_decay(state, now)
     return state
 
-def update_reputation(db: Dict[str, Any], agent_id: str, decision: str) -> Dict[str, Any]:
+def update_reputation(
+    db: Dict[str, Any], agent_id: str, decision: str, now: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Apply decay first, then update counters and reputation based on decision.
     allow  -> +1
     deny   -> -2
     review -> -1 (soft penalty)
     """
-    state = get_state(db, agent_id)
+    if now is None:
+        now = _now()
+    state = get_state(db, agent_id, now)
 
     decision = (decision or "").lower().strip()
 
@@ -120,5 +218,5 @@ def update_reputation(db: Dict[str, Any], agent_id: str, decision: str) -> Dict[
         state["reputation"] = int(state.get("reputation", 0) or 0) - 1
         state["last_decision"] = "review"
 
-    state["updated_at"] = _now()
+    state["updated_at"] = now
     return state
@@ -1,17 +1,17 @@
 import os
-import hmac
-import hashlib
-import json
 from typing import Any, Dict, Tuple
 
+from sentinel_core.crypto import hmac_proto
+from sentinel_core.utils import canonical_json as _canonical_json
+
 
 SIGNING_SCHEME = "hmac-sha256"
 DEFAULT_KEY_ID = "local-dev-key-1"
 
 
 def canonical_json(payload: Dict[str, Any]) -> bytes:
-    # Stable ordering so signatures are reproducible
-    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    # Stable ordering so signatures are reproducible (orjson-backed, same bytes)
+    return _canonical_json(payload, ensure_ascii=False)
 
 
 def sign_payload(payload: Dict[str, Any]) -> Tuple[str, str, str]:
@@ -23,6 +23,7 @@ def sign_payload(payload: Dict[str, Any]) -> Tuple[str, str, str]:
         # If secret isn't set, we still return empty signature fields (safe default).
         return "", SIGNING_SCHEME, DEFAULT_KEY_ID
 
-    msg = canonical_json(payload)
-    sig = hmac.new(secret.encode("utf-8"), msg, hashlib.sha256).hexdigest()
+    h = hmac_proto(secret).copy()
+    h.update(canonical_json(payload))
+    sig = h.hexdigest()
     return sig, SIGNING_SCHEME, os.getenv("SENTINEL_SIGNING_KEY_ID", DEFAULT_KEY_ID)
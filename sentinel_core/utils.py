@@ -1,5 +1,90 @@
 import hashlib
+import json
 import os
+import re
+import time
+from typing import Any, Tuple
+
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None
+
+# orjson and json disagree on float exponent form (1e-05 vs 0.00001,
+# 1e+16 vs 1e16); such output is re-encoded with json. A match inside a
+# string value only costs the fallback, never a different result.
+_FLOAT_DRIFT = re.compile(rb"\d[eE]|0\.0000")
+
+
+def canonical_json(obj: Any, ensure_ascii: bool = True) -> bytes:
+    """
+    json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=...)
+    as UTF-8 bytes. Encoded by orjson whenever it yields the same bytes, so
+    existing digests, HMACs and signatures stay valid. NaN/Infinity are not
+    canonical JSON and are not supported.
+    """
+    if orjson is not None:
+        try:
+            msg = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            msg = None
+        if msg is not None and not _FLOAT_DRIFT.search(msg) and (
+            not ensure_ascii or (msg.isascii() and b"\x7f" not in msg)
+        ):
+            return msg
+    return json.dumps(
+        obj, sort_keys=True, separators=(",", ":"), ensure_ascii=ensure_ascii
+    ).encode("utf-8")
+
+
+def loads(raw: str | bytes) -> Any:
+    """
+    json.loads via orjson; inputs orjson rejects (NaN/Infinity literals,
+    integers wider than 64 bits) still parse through json.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """
+    Compact UTF-8 JSON for storage and transport. Not a signing
+    canonicalization (see canonical_json): float formatting may differ.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else None)
+        except TypeError:
+            pass
+    return json.dumps(
+        obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") for the current second; swapped as one
+# tuple so concurrent readers never see a mismatched pair.
+_ISO_SEC: Tuple[int, str] = (-1, "")
+
+
+def utc_now_iso() -> str:
+    """
+    datetime.now(timezone.utc).isoformat() with microseconds always present;
+    the date/time prefix is formatted once per second.
+    """
+    global _ISO_SEC
+    t = time.time()
+    sec = int(t)
+    cached = _ISO_SEC
+    if cached[0] != sec:
+        cached = _ISO_SEC = (sec, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec)))
+    return f"{cached[1]}.{int((t - sec) * 1e6):06d}+00:00"
+
+
+_VT_SALT: str | None = None
 
 
 def variable_timestamp(command: str, timestamp: str, agent_id: str) -> str:
@@ -10,6 +95,10 @@ def variable_timestamp(command: str, timestamp: str, agent_id: str) -> str:
       - agent_id
     This avoids collisions across agents and repeated commands.
     """
-    secret_salt = os.getenv("SENTINEL_VT_SALT", "sentinel-vt-default-salt")
-    raw = f"{agent_id}|{timestamp}|{command}|{secret_salt}".encode("utf-8")
-    return hashlib.sha256(raw).hexdigest()[:16]
+    global _VT_SALT
+    if _VT_SALT is None:
+        # Read on first use, not import: callers load .env after importing us
+        _VT_SALT = os.getenv("SENTINEL_VT_SALT", "sentinel-vt-default-salt")
+    raw = f"{agent_id}|{timestamp}|{command}|{_VT_SALT}".encode("utf-8")
+    # == hexdigest()[:16], hex-encoding only the 8 bytes kept
+    return hashlib.sha256(raw).digest()[:8].hex()
@@ -10,6 +10,9 @@ APPROVED_Q = "ops:actions:approved"
 REJECTED_Q = "ops:actions:rejected"
 EXECUTED_Q = "ops:actions:executed"
 
+# How long action records are kept
+RECORD_TTL_SEC = 86400
+
 def get_redis():
     return redis.from_url(REDIS_URL, decode_responses=True)
 
@@ -31,7 +34,7 @@ def create_action(
     risk: str,
     risk_score: float,
     reason: str,
-    ttl: int = 86400,
+    ttl: int = RECORD_TTL_SEC,
 ) -> dict:
     r = get_redis()
     now = int(time.time())
@@ -50,29 +53,35 @@ def create_action(
         "created_ts": now,
     }
 
-    if decision == "review":
-        r.setex(record_key(action_id), ttl, json.dumps(rec, separators=(",", ":")))
-        r.rpush(PENDING_Q, action_id)
-
-    elif decision == "deny":
-        rec["status"] = "rejected"
-        rec["decision"] = "rejected"
-        rec["error"] = "rejected"
-        rec["rejected_ts"] = now
-        r.setex(record_key(action_id), ttl, json.dumps(rec, separators=(",", ":")))
-        r.rpush(REJECTED_Q, json.dumps(rec, separators=(",", ":")))
-
-    elif decision == "allow":
-        rec["status"] = "approved"
-        rec["decision"] = "approved"
-        rec["approved_ts"] = now
-        r.rpush(APPROVED_Q, json.dumps(rec, separators=(",", ":")))
-
-        rec["execution"] = _execution_payload(now, mode="auto")
-        rec["status"] = "executed"
-        rec["executed_ts"] = now
-        r.setex(record_key(action_id), ttl, json.dumps(rec, separators=(",", ":")))
-        r.rpush(EXECUTED_Q, json.dumps(rec, separators=(",", ":")))
+    # Record + queue push land together in one MULTI/EXEC round-trip
+    with r.pipeline(transaction=True) as p:
+        if decision == "review":
+            p.setex(record_key(action_id), ttl, json.dumps(rec, separators=(",", ":")))
+            p.rpush(PENDING_Q, action_id)
+
+        elif decision == "deny":
+            rec["status"] = "rejected"
+            rec["decision"] = "rejected"
+            rec["error"] = "rejected"
+            rec["rejected_ts"] = now
+            raw = json.dumps(rec, separators=(",", ":"))
+            p.setex(record_key(action_id), ttl, raw)
+            p.rpush(REJECTED_Q, raw)
+
+        elif decision == "allow":
+            rec["status"] = "approved"
+            rec["decision"] = "approved"
+            rec["approved_ts"] = now
+            p.rpush(APPROVED_Q, json.dumps(rec, separators=(",", ":")))
+
+            rec["execution"] = _execution_payload(now, mode="auto")
+            rec["status"] = "executed"
+            rec["executed_ts"] = now
+            raw = json.dumps(rec, separators=(",", ":"))
+            p.setex(record_key(action_id), ttl, raw)
+            p.rpush(EXECUTED_Q, raw)
+
+        p.execute()
 
     return rec
 
@@ -86,7 +95,7 @@ def load_action(action_id: str) -> dict | None:
     except Exception:
         return None
 
-def save_action(action_id: str, rec: dict, ttl: int = 86400) -> None:
+def save_action(action_id: str, rec: dict, ttl: int = RECORD_TTL_SEC) -> None:
     r = get_redis()
     r.setex(record_key(action_id), ttl, json.dumps(rec, separators=(",", ":")))
 
@@ -101,15 +110,19 @@ def approve_action(action_id: str) -> dict | None:
     rec["status"] = "approved"
     rec["decision"] = "approved"
     rec["approved_ts"] = now
-    r.lrem(PENDING_Q, 0, action_id)
-    r.rpush(APPROVED_Q, json.dumps(rec, separators=(",", ":")))
+    approved_raw = json.dumps(rec, separators=(",", ":"))
 
     rec["execution"] = _execution_payload(now, mode="manual")
     rec["status"] = "executed"
     rec["executed_ts"] = now
+    executed_raw = json.dumps(rec, separators=(",", ":"))
 
-    save_action(action_id, rec)
-    r.rpush(EXECUTED_Q, json.dumps(rec, separators=(",", ":")))
+    with r.pipeline(transaction=True) as p:
+        p.lrem(PENDING_Q, 0, action_id)
+        p.rpush(APPROVED_Q, approved_raw)
+        p.setex(record_key(action_id), RECORD_TTL_SEC, executed_raw)
+        p.rpush(EXECUTED_Q, executed_raw)
+        p.execute()
 
     return rec
 
@@ -124,10 +137,13 @@ def reject_action(action_id: str, reason: str = "manual rejection") -> dict | No
     rec["error"] = "rejected"
     rec["reason"] = reason
     rec["rejected_ts"] = int(time.time())
-    save_action(action_id, rec)
+    raw = json.dumps(rec, separators=(",", ":"))
 
-    r.lrem(PENDING_Q, 0, action_id)
-    r.rpush(REJECTED_Q, json.dumps(rec, separators=(",", ":")))
+    with r.pipeline(transaction=True) as p:
+        p.setex(record_key(action_id), RECORD_TTL_SEC, raw)
+        p.lrem(PENDING_Q, 0, action_id)
+        p.rpush(REJECTED_Q, raw)
+        p.execute()
     return rec
 
 def safe_len(key: str) -> int:
@@ -0,0 +1,45 @@
+import re
+from typing import Iterable, Optional
+
+try:
+    import ahocorasick  # type: ignore
+except Exception:
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """
+    Finds which of a fixed keyword list occurs in a string, in one pass.
+    first() returns the earliest keyword in list order, the same result as
+    `next((k for k in words if k in text), None)`.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words = list(words)
+        self._automaton = None
+        self._any = None
+        if not self.words:
+            return
+        if ahocorasick is not None:
+            a = ahocorasick.Automaton()
+            for i, w in enumerate(self.words):
+                # Duplicates keep their first position
+                if w not in a:
+                    a.add_word(w, i)
+            a.make_automaton()
+            self._automaton = a
+        else:
+            # Without pyahocorasick: one regex scan rules out the common
+            # no-hit case before the ordered `in` checks.
+            self._any = re.compile("|".join(map(re.escape, self.words)))
+
+    def first(self, text: str) -> Optional[str]:
+        if self._automaton is not None:
+            best = min((i for _, i in self._automaton.iter(text)), default=None)
+            return None if best is None else self.words[best]
+        if self._any is None or not self._any.search(text):
+            return None
+        for w in self.words:
+            if w in text:
+                return w
+        return None
@@ -1,6 +1,8 @@
 import re
 from enum import Enum
 
+from sentinel_rules._matcher import KeywordMatcher
+
 class Decision(str, Enum):
     APPROVED = "APPROVED"
     WARN = "WARN"
@@ -19,16 +21,19 @@ HIGH_RISK_PATTERNS = [
 
 ELEVATED_KEYWORDS = ["sudo", "chmod 777", "dd if=", "mkfs", "shutdown", "reboot"]
 
+_HIGH_RISK_RX = [re.compile(p) for p in HIGH_RISK_PATTERNS]
+_ELEVATED = KeywordMatcher(ELEVATED_KEYWORDS)
+
 def evaluate_command(cmd: str):
     cmd = (cmd or "").strip()
 
-    for pat in HIGH_RISK_PATTERNS:
-        if re.search(pat, cmd):
+    for rx in _HIGH_RISK_RX:
+        if rx.search(cmd):
             return Decision.BLOCKED, Risk.CRITICAL, f"Command matches high-risk pattern: {cmd}"
 
-    for kw in ELEVATED_KEYWORDS:
-        if kw in cmd:
-            return Decision.WARN, Risk.MEDIUM, f"Command contains elevated keyword: {kw}"
+    kw = _ELEVATED.first(cmd)
+    if kw is not None:
+        return Decision.WARN, Risk.MEDIUM, f"Command contains elevated keyword: {kw}"
 
     if cmd == "":
         return Decision.WARN, Risk.LOW, "Empty command"
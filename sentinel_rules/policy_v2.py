@@ -1,6 +1,7 @@
 import os
 import re
 import json
+from functools import lru_cache
 from pathlib import Path
 from typing import Tuple
 
@@ -39,6 +40,17 @@ DENY_PATTERNS = [
      "Matched high-risk pattern: 'chown -R * /'"),
 ]
 
+# One pass over the command for "does anything match": a single alternation
+# is several times cheaper than nine separate searches on the (common) clean
+# command. Case-insensitive, so it never misses what a pattern would match;
+# the ordered loop then picks the reason.
+_DENY_ANY = re.compile("|".join(f"(?:{rx.pattern})" for rx, _ in DENY_PATTERNS), re.IGNORECASE)
+# Same alternation with ASCII-only classes and case folding (~2x faster).
+# On printable ASCII input \b \w \s \S and IGNORECASE behave identically
+# in both modes (Unicode \s also matches \x1c-\x1f, hence printable).
+_DENY_ANY_ASCII = re.compile(_DENY_ANY.pattern, re.IGNORECASE | re.ASCII)
+_DENY_SEARCH = [(rx.search, reason) for rx, reason in DENY_PATTERNS]
+
 # ---- Commands requiring human approval ----
 REQUIRE_APPROVAL = [
     s.strip().lower()
@@ -48,11 +60,31 @@ REQUIRE_APPROVAL = [
 
 POLICY_FILE = os.getenv("SENTINEL_POLICY_FILE", "policies/policy.validator.json")
 
-def _load_validator_policy() -> dict | None:
+# (stat stamp, parsed policy); re-read only when the file changes
+_policy_cache: Tuple[tuple | None, dict | None] = (None, None)
+
+def _policy_stamp() -> tuple | None:
     try:
-        return json.loads(Path(POLICY_FILE).read_text())
-    except Exception:
+        st = os.stat(POLICY_FILE)
+    except OSError:
         return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _load_validator_policy(stamp: tuple | None = None) -> dict | None:
+    global _policy_cache
+    if stamp is None:
+        stamp = _policy_stamp()
+    if stamp is None:
+        return None
+    cached_stamp, policy = _policy_cache
+    if cached_stamp == stamp:
+        return policy
+    try:
+        policy = json.loads(Path(POLICY_FILE).read_text())
+    except Exception:
+        policy = None
+    _policy_cache = (stamp, policy)
+    return policy
 
 def _match_validator_rule(rule: dict, cmd_type: str | None, target: str | None) -> bool:
     match = rule.get("match") or {}
@@ -67,8 +99,8 @@ def _match_validator_rule(rule: dict, cmd_type: str | None, target: str | None)
 
     return True
 
-def _evaluate_validator_policy(cmd_type: str | None, target: str | None):
-    policy = _load_validator_policy()
+def _evaluate_validator_policy(cmd_type: str | None, target: str | None, stamp: tuple | None = None):
+    policy = _load_validator_policy(stamp)
     if not policy:
         return None
 
@@ -90,20 +122,32 @@ def _evaluate_validator_policy(cmd_type: str | None, target: str | None):
 
     return None
 
+def _reputation_gate(reputation) -> int:
+    # 0 = deny, 1 = review, 2 = pass; the only way reputation affects a result
+    if reputation <= REP_DENY_AT:
+        return 0
+    if reputation <= REP_REVIEW_AT:
+        return 1
+    return 2
+
 def evaluate_command_v2(command: str, reputation: int) -> Tuple[str, str, float, str]:
     """
     Returns: (decision, risk, risk_score, reason)
     decision: allow | deny | review
+
+    Pure in (command, reputation gate, policy file version), so results are
+    memoized on exactly that key; editing POLICY_FILE invalidates by stamp.
     """
+    return _evaluate((command or "").strip(), _reputation_gate(reputation), _policy_stamp())
 
-    cmd = (command or "").strip()
+@lru_cache(maxsize=4096)
+def _evaluate(cmd: str, gate: int, stamp: tuple | None) -> Tuple[str, str, float, str]:
 
 # ===============================
     # VALIDATOR EDITION HARD LOCK
     # ===============================
 
     try:
-        import json
         parsed = json.loads(cmd)
         cmd_type = parsed.get("type")
         target = parsed.get("target")
@@ -111,21 +155,23 @@ def evaluate_command_v2(command: str, reputation: int) -> Tuple[str, str, float,
         cmd_type = None
         target = None
 
-    policy_result = _evaluate_validator_policy(cmd_type, target)
+    policy_result = _evaluate_validator_policy(cmd_type, target, stamp)
     if policy_result is not None:
         return policy_result
 
     # 1) Reputation gate first (overrides everything)
-    if reputation <= REP_DENY_AT:
+    if gate == 0:
         return ("deny", "high", 0.99, f"Reputation too low (<= {REP_DENY_AT})")
 
-    if reputation <= REP_REVIEW_AT:
+    if gate == 1:
         return ("review", "medium", 0.60, f"Reputation low (<= {REP_REVIEW_AT})")
 
     # 2) Pattern-based hard denies
-    for rx, reason in DENY_PATTERNS:
-        if rx.search(cmd):
-            return ("deny", "high", 0.95, reason)
+    any_rx = _DENY_ANY_ASCII if cmd.isascii() and cmd.isprintable() else _DENY_ANY
+    if any_rx.search(cmd):
+        for search, reason in _DENY_SEARCH:
+            if search(cmd):
+                return ("deny", "high", 0.95, reason)
 
     # 3) Require approval keywords (soft gate)
     if REQUIRE_APPROVAL:
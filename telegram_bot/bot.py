@@ -2,11 +2,11 @@ import os
 import json
 import time
 import hmac
-import hashlib
 import logging
 from datetime import datetime, timezone
+from json.encoder import encode_basestring_ascii as _json_str
 
-import requests
+import httpx
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters
 
@@ -44,18 +44,37 @@ if not SIGNING_SECRET:
 if not AGENT_ID or not AGENT_PRIV_B64:
     raise RuntimeError("Missing AGENT_ID or AGENT_PRIV_B64 in env")
 
+# One keep-alive async client for all calls to sentinel-api; awaited from the
+# handlers so a slow analyze never blocks the Telegram event loop.
+CLIENT = httpx.AsyncClient(
+    timeout=HTTP_TIMEOUT,
+    limits=httpx.Limits(max_connections=50, max_keepalive_connections=10),
+)
+
+STATIC_HEADERS = {
+    "Content-Type": "application/json",
+    "X-API-Key": API_KEY,
+}
+
+
+_HMAC_KEY = SIGNING_SECRET.encode("utf-8")
+
+
+def _signed_fields(agent_id: str, command: str, ts_iso: str, ts_unix: str) -> bytes:
+    # Must match server-side canonicalization: canonical_bytes() of these four
+    # str fields, written out directly (keys already in sorted order)
+    return (
+        f'{{"agent_id":{_json_str(agent_id)},"command":{_json_str(command)},'
+        f'"timestamp":{_json_str(ts_iso)},"ts_unix":{_json_str(ts_unix)}}}'
+    ).encode("ascii")
+
 
 def _hmac_signature(agent_id: str, command: str, ts_iso: str, ts_unix: str) -> str:
-    # Must match server-side canonicalization
-    body = json.dumps(
-        {"agent_id": agent_id, "command": command, "timestamp": ts_iso, "ts_unix": ts_unix},
-        sort_keys=True,
-        separators=(",", ":"),
-    ).encode("utf-8")
-    return hmac.new(SIGNING_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    body = _signed_fields(agent_id, command, ts_iso, ts_unix)
+    return hmac.digest(_HMAC_KEY, body, "sha256").hex()
 
 
-def sentinel_analyze(command: str) -> dict:
+async def sentinel_analyze(command: str) -> dict:
     ts_iso = datetime.now(timezone.utc).isoformat()
     ts_unix = str(int(time.time()))
 
@@ -77,22 +96,21 @@ def sentinel_analyze(command: str) -> dict:
     agent_sig = sign_payload(AGENT_PRIV_B64, agent_sig_payload)
 
     headers = {
-        "Content-Type": "application/json",
-        "X-API-Key": API_KEY,
+        **STATIC_HEADERS,
         "X-Timestamp-Unix": ts_unix,
         "X-Signature": x_sig,
         "X-Agent-Signature": agent_sig,
     }
 
-    r = requests.post(SENTINEL_URL, json=payload, headers=headers, timeout=HTTP_TIMEOUT)
+    r = await CLIENT.post(SENTINEL_URL, json=payload, headers=headers)
     # Helpful error message
     if r.status_code >= 400:
         raise RuntimeError(f"Sentinel HTTP {r.status_code}: {r.text}")
     return r.json()
 
 
-def api_health() -> dict:
-    r = requests.get(f"{API_BASE_URL}/health", timeout=5)
+async def api_health() -> dict:
+    r = await CLIENT.get(f"{API_BASE_URL}/health", timeout=5)
     if r.status_code >= 400:
         raise RuntimeError(f"Health HTTP {r.status_code}: {r.text}")
     return r.json()
@@ -125,7 +143,7 @@ async def cmd_whoami(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def cmd_health(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        h = api_health()
+        h = await api_health()
         await update.message.reply_text(f"health: {json.dumps(h)}")
     except Exception as e:
         await update.message.reply_text(f"health error: {e}")
@@ -146,7 +164,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     try:
-        result = sentinel_analyze(text)
+        result = await sentinel_analyze(text)
         decision = result.get("decision")
         risk = result.get("risk")
         reason = result.get("reason")
@@ -160,12 +178,22 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"analyze error: {e}")
 
 
+async def _close_client(app) -> None:
+    await CLIENT.aclose()
+
+
 def main():
     log.info("telegram bot starting…")
     log.info("SENTINEL_URL=%s", SENTINEL_URL)
     log.info("API_BASE_URL=%s", API_BASE_URL)
 
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    app = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .concurrent_updates(True)
+        .post_shutdown(_close_client)
+        .build()
+    )
 
     app.add_handler(CommandHandler("start", cmd_start))
     app.add_handler(CommandHandler("health", cmd_health))
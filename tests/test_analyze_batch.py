@@ -0,0 +1,87 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep sentinel_api's state files (sqlite, logs, reputation journal) out of
+# the tree; it also reads agents.json from the cwd at import
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:1/0")
+os.environ["SENTINEL_DB_PATH"] = os.path.join(_tmp.name, "sentinel.db")
+os.environ["SENTINEL_LOG_DIR"] = os.path.join(_tmp.name, "logs")
+os.environ["SENTINEL_REPUTATION_DB"] = os.path.join(_tmp.name, "reputation.json")
+_cwd = os.getcwd()
+os.chdir(_tmp.name)
+with open("agents.json", "w") as f:
+    json.dump({}, f)
+try:
+    import sentinel_api  # noqa: E402
+finally:
+    os.chdir(_cwd)
+
+
+class _Req:
+    client = None
+
+
+def _item(agent_id, target):
+    return sentinel_api.AnalyzeBatchItem(
+        agent_id=agent_id,
+        command=json.dumps({"type": "restart_service", "target": target}),
+        timestamp="2026-01-01T00:00:00Z",
+        signature="sig",
+        ts_unix="1",
+    )
+
+
+class AnalyzeBatchRepGateTest(unittest.TestCase):
+    def test_rep_gate_sees_earlier_items_of_same_agent(self):
+        # Starts between the deny and review thresholds; the first item is
+        # denied by policy and its penalty drops the agent below REP_AUTO_DENY.
+        start = sentinel_api.REP_AUTO_DENY + 0.05
+        store = {"a1": start}
+
+        def apply_outcome(agent_id, decision):
+            if decision == "deny":
+                store[agent_id] = max(0.0, store[agent_id] - 0.08)
+            return store[agent_id]
+
+        def evaluate(command, reputation):
+            if "bad" in command:
+                return "deny", "high", 0.95, "policy deny"
+            return "allow", "low", 0.1, "ok"
+
+        with mock.patch.multiple(
+            sentinel_api,
+            _analyze_admit=lambda req, sig, ts: b"canon:" + req.command.encode(),
+            # Batch-wide prefetch: every item sees the rep from before the batch
+            _replay_check_and_set_many=lambda items: [(True, start)] * len(items),
+            get_pubkey_and_revoked=lambda agent_id: ("pub", False),
+            verify_ed25519_signature=lambda pub, msg, sig: True,
+            has_capability=lambda agent_id, cap: True,
+            check_behavior_limits=lambda agent_id, action_type: (True, ""),
+            record_behavior_event=lambda agent_id, action_type: None,
+            evaluate_command_v2=evaluate,
+            get_rep=lambda agent_id: store[agent_id],
+            apply_outcome=apply_outcome,
+            append_audit_log=lambda kind, data: None,
+            send_telegram_alert=lambda msg: None,
+            get_queue_redis=mock.MagicMock(),
+        ):
+            batch = sentinel_api.AnalyzeBatch(items=[_item("a1", "bad"), _item("a1", "api")])
+            resp = sentinel_api.analyze_batch(_Req(), batch)
+
+        first, second = json.loads(resp.body)["results"]
+        self.assertEqual(first["decision"], "deny")
+        self.assertLess(store["a1"], sentinel_api.REP_AUTO_DENY)
+        self.assertEqual(second["decision"], "deny")
+        self.assertIn("Reputation gate", second["reason"])
+
+
+if __name__ == "__main__":
+    unittest.main()
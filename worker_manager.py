@@ -1,11 +1,12 @@
 import os
 import time
-import json
-import uuid
+import secrets
 import hashlib
 import redis
+
 from datetime import datetime, timezone
 from ops_digest import digest_action
+from sentinel_core.utils import dumps, loads
 
 
 # -----------------------------
@@ -19,6 +20,8 @@ DECISIONS_Q = os.getenv("OPS_MANAGER_DECISIONS_Q", "ops:manager:decisions").stri
 PROPOSED_Q = os.getenv("OPS_PROPOSED_Q", "ops:actions:proposed").strip()
 
 POLL_SEC = float(os.getenv("MANAGER_POLL_SEC", "2").strip() or "2")
+# Incidents drained per BLMPOP round trip (Redis >= 7)
+BATCH = int(os.getenv("MANAGER_BATCH", "32").strip() or "32")
 DEDUPE_SEC = int(os.getenv("MANAGER_DEDUPE_SEC", "300").strip() or "300")
 RATE_LIMIT_SEC = int(os.getenv("MANAGER_RATE_LIMIT_SEC", "30").strip() or "30")
 
@@ -44,14 +47,6 @@ def now_ts() -> int:
     return int(time.time())
 
 
-def jdump(obj) -> str:
-    return json.dumps(obj, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
-
-
-def jload(s: str):
-    return json.loads(s)
-
-
 def incident_fingerprint(inc: dict) -> str:
     kind = (inc.get("kind") or "").strip()
     svc = (inc.get("service") or "").strip()
@@ -63,7 +58,8 @@ def incident_fingerprint(inc: dict) -> str:
     err = (ev.get("error") or "").strip()
 
     base = f"{svc}|{kind}|{sev}|{url}|{status}|{err[:120]}"
-    return hashlib.sha256(base.encode("utf-8")).hexdigest()
+    # Dedupe key, not a MAC: 128-bit blake2b is plenty and keeps keys short
+    return hashlib.blake2b(base.encode("utf-8"), digest_size=16).hexdigest()
 
 
 def classify_severity(inc: dict) -> str:
@@ -101,17 +97,21 @@ def recommend_action(inc: dict) -> dict:
     }
 
 
-def should_suppress(fp: str) -> tuple[bool, str]:
-    dedupe_key = f"ops:dedupe:{fp}"
-    rl_key = f"ops:ratelimit:{fp}"
+def _dedupe_key(fp: str) -> str:
+    return f"ops:dedupe:{fp}"
+
 
-    if r.exists(dedupe_key):
+def _ratelimit_key(fp: str) -> str:
+    return f"ops:ratelimit:{fp}"
+
+
+def should_suppress(fp: str) -> tuple[bool, str]:
+    # SET NX EX claims each gate atomically: no window between check and set
+    if not r.set(_dedupe_key(fp), "1", ex=DEDUPE_SEC, nx=True):
         return True, "dedupe"
-    r.set(dedupe_key, "1", ex=DEDUPE_SEC)
 
-    if r.exists(rl_key):
+    if not r.set(_ratelimit_key(fp), "1", ex=RATE_LIMIT_SEC, nx=True):
         return True, "rate_limit"
-    r.set(rl_key, "1", ex=RATE_LIMIT_SEC)
 
     return False, "emit"
 
@@ -122,66 +122,100 @@ def _global_freeze_active() -> bool:
     return bool(r.exists(OPS_GLOBAL_FREEZE_KEY))
 
 
-def _budget_allows() -> tuple[bool, str]:
+# Sliding-window budget: clean old entries, count and record in one atomic
+# call, so two managers can't both take the last slot.
+# KEYS: budget zset   ARGV: now_ts, window_sec, max, member
+_BUDGET_CLAIM = r.register_script("""
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - tonumber(ARGV[2]))
+local n = redis.call('ZCARD', KEYS[1])
+if n >= tonumber(ARGV[3]) then
+  return {0, n}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+return {1, n + 1}
+""")
+
+
+def _budget_claim() -> str | None:
+    """
+    Records one action against the budget. Returns the zset member (""
+    when no budget is configured), or None when the budget is exhausted.
+    """
     if BUDGET_MAX <= 0:
-        return True, "ok"
+        return ""
     ts = now_ts()
-    cutoff = ts - BUDGET_WINDOW_SEC
+    # unique member
+    member = f"{ts}:{secrets.token_hex(4)}"
+    ok, _ = _BUDGET_CLAIM(keys=[BUDGET_ZSET], args=[ts, BUDGET_WINDOW_SEC, BUDGET_MAX, member])
+    return member if ok else None
 
-    # Clean old entries
-    r.zremrangebyscore(BUDGET_ZSET, 0, cutoff)
 
-    count = r.zcard(BUDGET_ZSET)
-    if count >= BUDGET_MAX:
-        return False, f"budget_exceeded {count}/{BUDGET_MAX} in {BUDGET_WINDOW_SEC}s"
-    return True, "ok"
+def _budget_release(member: str) -> None:
+    # Give back a slot taken by _budget_claim for an action not proposed
+    if member:
+        r.zrem(BUDGET_ZSET, member)
 
 
-def _budget_record_event():
-    if BUDGET_MAX <= 0:
-        return
-    ts = now_ts()
-    # unique member
-    member = f"{ts}:{uuid.uuid4().hex[:8]}"
-    r.zadd(BUDGET_ZSET, {member: ts})
+def _release_claims(budget_member: str, keys: list) -> None:
+    # Best effort: undo the claims of a proposal whose writes failed (the
+    # keys expire on their own if Redis is still unreachable)
+    try:
+        if keys:
+            r.delete(*keys)
+        _budget_release(budget_member)
+    except redis.RedisError:
+        pass
 
 
 def _cooldown_key(action_type: str, target: str) -> str:
     return f"ops:cooldown:{action_type}:{target}"
 
 
-def propose_from_recommendation(inc: dict, rec: dict, fp: str) -> str | None:
+def propose_from_recommendation(inc: dict, rec: dict, fp: str, pipe=None, claims=None) -> str | None:
+    """
+    With `pipe`, the record/enqueue writes are queued on it for the caller to
+    execute; the claims taken here are appended to `claims` so the caller can
+    hand them to _release_claims if that execute fails.
+    """
     if not rec:
         return None
     if (rec.get("type") or "") == "none":
         return None
 
+    action_type = (rec.get("type") or "").strip()
+    target = (rec.get("target") or "").strip()
+
     if _global_freeze_active():
         return None
 
-    ok, why = _budget_allows()
-    if not ok:
+    budget_member = _budget_claim()
+    if budget_member is None:
         return None
 
+    action_id = f"act_{now_ts()}_{secrets.token_hex(3)}"
+
     # prevent repeated proposals for same fingerprint during TTL
     fp_key = f"ops:proposed:fp:{fp}"
-    if r.exists(fp_key):
+    if not r.set(fp_key, action_id, ex=PROPOSE_TTL_SEC, nx=True):
+        _budget_release(budget_member)
         print("propose_suppressed: already proposed for fp", fp[:12], flush=True)
         return None
 
-    action_type = (rec.get("type") or "").strip()
-    target = (rec.get("target") or "").strip()
+    held = [fp_key]
 
     # target cooldown
     if TARGET_COOLDOWN_SEC > 0:
         cd_key = _cooldown_key(action_type, target)
-        if r.exists(cd_key):
+        if not r.set(cd_key, "1", ex=TARGET_COOLDOWN_SEC, nx=True):
+            # not proposed after all; release the fingerprint claim
+            r.delete(fp_key)
+            _budget_release(budget_member)
             print("propose_suppressed: cooldown active for", action_type, target, flush=True)
             return None
-        r.set(cd_key, "1", ex=TARGET_COOLDOWN_SEC)
+        held.append(cd_key)
 
-    action_id = f"act_{now_ts()}_{uuid.uuid4().hex[:6]}"
-    incident_id = (inc.get("incident_id") or "").strip() or f"inc_{uuid.uuid4().hex[:8]}"
+    incident_id = (inc.get("incident_id") or "").strip() or f"inc_{secrets.token_hex(4)}"
 
     record = {
         "action_id": action_id,
@@ -203,16 +237,94 @@ def propose_from_recommendation(inc: dict, rec: dict, fp: str) -> str | None:
     # canonical digest (shared across manager/approver/executor)
     record["digest"] = digest_action(record["action"])
 
-    r.set(f"ops:action:{action_id}", jdump(record))
-    r.rpush(PROPOSED_Q, action_id)
+    # record + enqueue: one round trip (the caller's, when it passes its
+    # pipeline)
+    p = pipe if pipe is not None else r.pipeline(transaction=False)
+    p.set(f"ops:action:{action_id}", dumps(record, sort_keys=True))
+    p.rpush(PROPOSED_Q, action_id)
+    if pipe is None:
+        try:
+            p.execute()
+        except Exception:
+            _release_claims(budget_member, held)
+            raise
+    elif claims is not None:
+        claims.append((budget_member, held))
 
-    # mark proposal for fingerprint
-    r.set(fp_key, action_id, ex=PROPOSE_TTL_SEC)
+    return action_id
 
-    # budget event
-    _budget_record_event()
 
-    return action_id
+def handle_incident(payload: str) -> None:
+    ts = now_ts()
+
+    try:
+        inc = loads(payload)
+    except Exception:
+        r.rpush(DECISIONS_Q, dumps({
+            "ts": ts,
+            "manager": MANAGER_ID,
+            "ok": False,
+            "error": "invalid_json",
+            "raw": (payload or "")[:300],
+        }, sort_keys=True))
+        return
+
+    fp = incident_fingerprint(inc)
+    sev = classify_severity(inc)
+    rec = recommend_action(inc)
+    aid = None
+    claims = []
+
+    suppress, why = should_suppress(fp)
+
+    # Every other write for this incident goes out in one round trip
+    pipe = r.pipeline(transaction=False)
+
+    # Fields shared by the decision and triaged records
+    common = {
+        "ts": ts,
+        "manager": MANAGER_ID,
+        "fingerprint": fp,
+        "suppressed": suppress,
+        "suppress_reason": why,
+        "severity": sev,
+        "recommendation": rec,
+    }
+
+    # Always write decision audit record
+    pipe.rpush(DECISIONS_Q, dumps({
+        **common,
+        "incident_id": inc.get("incident_id"),
+        "kind": inc.get("kind"),
+        "service": inc.get("service"),
+    }, sort_keys=True))
+
+    # Emit triaged only if not suppressed
+    if not suppress:
+        pipe.rpush(TRIAGED_Q, dumps({**common, "incident": inc}, sort_keys=True))
+
+        if ENABLE_PROPOSE:
+            aid = propose_from_recommendation(inc, rec, fp, pipe, claims)
+
+    try:
+        pipe.execute()
+    except Exception:
+        # Nothing was recorded: give back the gates should_suppress claimed
+        # and the proposal's slot and keys, so a retry is not suppressed
+        gates = []
+        if why != "dedupe":
+            gates.append(_dedupe_key(fp))
+        if why == "emit":
+            gates.append(_ratelimit_key(fp))
+        claims.append(("", gates))
+        for budget_member, keys in claims:
+            _release_claims(budget_member, keys)
+        raise
+
+    if not suppress:
+        print("triaged:", inc.get("incident_id"), inc.get("kind"), "sev=", sev, flush=True)
+    if aid:
+        print("proposed:", aid, "->", rec.get("type"), "target=", rec.get("target"), flush=True)
 
 
 def run():
@@ -231,68 +343,26 @@ def run():
     print("OPS_GLOBAL_FREEZE_KEY =", OPS_GLOBAL_FREEZE_KEY, flush=True)
     print("MANAGER_ENABLE_PROPOSE =", ENABLE_PROPOSE, flush=True)
     print("MANAGER_PROPOSE_TTL_SEC =", PROPOSE_TTL_SEC, flush=True)
+    print("MANAGER_BATCH =", BATCH, flush=True)
 
     while True:
-        raw = r.blpop(INCIDENTS_Q, timeout=5)
-        if not raw:
-            time.sleep(POLL_SEC)
-            continue
-
-        _, payload = raw
-        ts = now_ts()
-
         try:
-            inc = jload(payload)
-        except Exception:
-            r.rpush(DECISIONS_Q, jdump({
-                "ts": ts,
-                "manager": MANAGER_ID,
-                "ok": False,
-                "error": "invalid_json",
-                "raw": (payload or "")[:300],
-            }))
+            raw = r.blmpop(5, 1, INCIDENTS_Q, direction="LEFT", count=BATCH)
+        except redis.RedisError as e:
+            # back off instead of hot-looping while Redis is down
+            print("redis error:", e, flush=True)
+            time.sleep(POLL_SEC)
             continue
-
-        fp = incident_fingerprint(inc)
-        suppress, why = should_suppress(fp)
-        sev = classify_severity(inc)
-        rec = recommend_action(inc)
-
-        # Always write decision audit record
-        r.rpush(DECISIONS_Q, jdump({
-            "ts": ts,
-            "manager": MANAGER_ID,
-            "fingerprint": fp,
-            "suppressed": suppress,
-            "suppress_reason": why,
-            "severity": sev,
-            "recommendation": rec,
-            "incident_id": inc.get("incident_id"),
-            "kind": inc.get("kind"),
-            "service": inc.get("service"),
-        }))
-
-        # Emit triaged only if not suppressed
-        if not suppress:
-            triaged = {
-                "ts": ts,
-                "manager": MANAGER_ID,
-                "fingerprint": fp,
-                "suppressed": suppress,
-                "suppress_reason": why,
-                "incident": inc,
-                "severity": sev,
-                "recommendation": rec,
-            }
-            r.rpush(TRIAGED_Q, jdump(triaged))
-            print("triaged:", inc.get("incident_id"), inc.get("kind"), "sev=", sev, flush=True)
-
-            if ENABLE_PROPOSE:
-                aid = propose_from_recommendation(inc, rec, fp)
-                if aid:
-                    print("proposed:", aid, "->", rec.get("type"), "target=", rec.get("target"), flush=True)
-
-        time.sleep(POLL_SEC)
+        if not raw:
+            continue  # BLMPOP already waited
+
+        _, payloads = raw
+        for payload in payloads:
+            # one bad item must not drop the rest of the batch
+            try:
+                handle_incident(payload)
+            except Exception as e:
+                print("incident error:", repr(e), flush=True)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,13 @@
 import os
 import time
-import json
 import redis
-import urllib.request
-import urllib.error
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlparse
 
+from sentinel_core.utils import dumps
+
 # -----------------------------
 # Config
 # -----------------------------
@@ -30,9 +32,12 @@ FAILCOUNT_KEY_PREFIX = os.getenv("PROBE_FAILCOUNT_PREFIX", "ops:probe:failcount:
 
 r = redis.from_url(REDIS_URL, decode_responses=True)
 
-
-def jdump(obj) -> str:
-    return json.dumps(obj, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+# Keep-alive connections to the probed endpoints across ticks; sized for
+# the probe thread pool, no retries (a retry would mask a failing probe).
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
 
 
 def parse_targets(s: str):
@@ -58,21 +63,19 @@ def http_probe(url: str, timeout: float):
     - status is HTTP code when available, else "".
     - err is non-empty on failure.
     """
-    req = urllib.request.Request(url, method="GET")
     try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            code = getattr(resp, "status", 200)
-            ok = 200 <= int(code) < 300
-            return ok, str(code), ""
-    except urllib.error.HTTPError as e:
-        return False, str(getattr(e, "code", "")), f"HTTPError: {e}"
-    except urllib.error.URLError as e:
-        return False, "", f"URLError: {e}"
+        resp = SESSION.get(url, timeout=timeout)
+        code = resp.status_code
+        if 200 <= code < 300:
+            return True, str(code), ""
+        return False, str(code), f"HTTPError: HTTP Error {code}: {resp.reason}"
+    except requests.RequestException as e:
+        return False, "", f"{type(e).__name__}: {e}"
     except Exception as e:
         return False, "", f"Exception: {e}"
 
 
-def emit_incident(service: str, url: str, status: str, error: str):
+def emit_incident(service: str, url: str, status: str, error: str, pipe=None):
     ts = int(time.time())
     incident = {
         "incident_id": f"inc_{ts}_{service}",
@@ -86,7 +89,7 @@ def emit_incident(service: str, url: str, status: str, error: str):
             "error": (error or "")[:300],
         },
     }
-    r.rpush(INCIDENTS_Q, jdump(incident))
+    (pipe if pipe is not None else r).rpush(INCIDENTS_Q, dumps(incident, sort_keys=True))
 
 
 def run():
@@ -105,27 +108,50 @@ def run():
         while True:
             time.sleep(POLL_SEC)
 
+    # Redis keys are fixed per target; build them once
+    targets = [
+        (svc, url, f"{STATE_KEY_PREFIX}{svc}", f"{FAILCOUNT_KEY_PREFIX}{svc}")
+        for svc, url in targets
+    ]
+
+    # Probes are independent and I/O-bound: a tick takes max(probe), not sum
+    pool = ThreadPoolExecutor(max_workers=min(32, len(targets)))
+
+    # Last (state, failcount) written per service. This worker owns those
+    # keys, so Redis is only read once to seed them after a restart.
+    known: dict[str, tuple[str, int]] = {}
+
     while True:
-        for svc, url in targets:
-            state_key = f"{STATE_KEY_PREFIX}{svc}"
-            fc_key = f"{FAILCOUNT_KEY_PREFIX}{svc}"
+        futures = [pool.submit(http_probe, url, TIMEOUT_SEC) for _, url, _, _ in targets]
+
+        missing = [t for t in targets if t[0] not in known]
+        if missing:
+            with r.pipeline(transaction=False) as p:
+                for _, _, state_key, fc_key in missing:
+                    p.get(state_key)
+                    p.get(fc_key)
+                prev = p.execute()
+            for i, (svc, _, _, _) in enumerate(missing):
+                try:
+                    fc = int(prev[2 * i + 1] or "0")
+                except Exception:
+                    fc = 0
+                known[svc] = ((prev[2 * i] or "unknown").strip(), fc)
+
+        # every write for the tick in one round trip
+        pipe = r.pipeline(transaction=False)
 
-            prev_state = (r.get(state_key) or "unknown").strip()
+        for (svc, url, state_key, fc_key), fut in zip(targets, futures):
+            prev_state, prev_fc = known[svc]
 
-            ok, status, err = http_probe(url, TIMEOUT_SEC)
+            ok, status, err = fut.result()
 
             # Update failcount
             if ok:
                 failcount = 0
-                r.set(fc_key, "0")
                 now_state = "ok"
             else:
-                try:
-                    failcount = int(r.get(fc_key) or "0")
-                except Exception:
-                    failcount = 0
-                failcount += 1
-                r.set(fc_key, str(failcount))
+                failcount = prev_fc + 1
 
                 # only become "fail" once threshold reached
                 if failcount >= FAIL_THRESHOLD:
@@ -139,16 +165,22 @@ def run():
             # EDGE TRIGGER:
             # emit only on ok/unknown -> fail transition
             if now_state == "fail" and prev_state != "fail":
-                emit_incident(svc, url, status, err)
+                emit_incident(svc, url, status, err, pipe)
                 print(f"incident emitted: {svc}", flush=True)
 
             # Optional recovery log (no incident)
             if prev_state == "fail" and now_state == "ok":
                 print(f"state: {svc} -> ok", flush=True)
 
-            # Always store current state
-            r.set(state_key, now_state)
+            # Store only what changed (steady state: no writes at all)
+            if failcount != prev_fc:
+                pipe.set(fc_key, str(failcount))
+            if now_state != prev_state:
+                pipe.set(state_key, now_state)
+            known[svc] = (now_state, failcount)
 
+        if len(pipe):
+            pipe.execute()
         time.sleep(POLL_SEC)
 
 